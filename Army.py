@@ -3,9 +3,32 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime, timedelta
+import io
+import os
 import warnings
 warnings.filterwarnings('ignore')
 
+# Options de rendu multi-résolution (voir create_army_analysis)
+RENDER_DEFAULTS = {
+    "poster": False,                 # PNG pleine résolution (ancien comportement)
+    "poster_dpi": 300,
+    "medium_dpi": 100,               # PNG intermédiaire pour l'affichage web
+    "thumbnail_size": (320, 384),    # Vignette (largeur, hauteur max en pixels)
+    "thumbnail_colors": 64,          # Palette réduite -> vignette de quelques Ko
+    "tiles": False,                  # Découpage d'un PNG par panneau
+    "vector_formats": ("svg", "pdf"),
+    "png_compress_level": 6,         # Niveau zlib 0-9
+    "png_optimize": False,           # Passe d'optimisation PIL (plus lent)
+}
+
+# Pays et composantes disponibles dans le registre
+ENTITES = [
+    "Allemagne", "Autriche", "Belgique", "Bulgarie", "Chypre", "Croatie", "Danemark", "Espagne",
+    "Estonie", "Finlande", "France", "Grece", "Hongrie", "Irlande", "Italie", "Lettonie", "Lituanie",
+    "Luxembourg", "Malte", "Pays-Bas", "Pologne", "Portugal", "Republique Tcheque", "Roumanie",
+    "Slovaquie", "Slovenie", "Suede", "UE-27", "Forces Terrestres", "Forces Maritimes", "Forces Aeriennes"
+]
+
 class EuropeanArmyAnalyzer:
     def __init__(self, country_or_component):
         self.country_component = country_or_component
@@ -14,6 +37,9 @@ class EuropeanArmyAnalyzer:
         
         self.start_year = 2017  # PESCO lancé en 2017
         self.end_year = 2027
+        # Année de référence des comparaisons avant/après (coopération renforcée).
+        # 2017 laisserait la période "avant" vide sur l'horizon 2017-2027.
+        self.reference_year = 2020
         
         # Configuration spécifique pour chaque pays/composante
         self.config = self._get_country_component_config()
@@ -687,8 +713,68 @@ class EuropeanArmyAnalyzer:
                 df.loc[i, 'Projets_PESCO'] *= 1.15  # Accélération des projets
                 df.loc[i, 'Interoperabilite'] *= 1.07  # Amélioration accélérée
     
-    def create_army_analysis(self, df):
-        """Crée une analyse complète de l'intégration militaire européenne"""
+    def compute_derived_metrics(self, df, reference_year=None):
+        """Calcule en une passe vectorisée les métriques dérivées de tous les indicateurs
+        
+        Retourne un dict :
+        - 'yoy' : DataFrame des variations annuelles (%) indexé par 'Annee'
+        - 'summary' : DataFrame indexé par indicateur avec premier, dernier,
+          croissance_pct, cagr_pct, moyenne, somme, moyenne_avant, moyenne_apres,
+          delta et delta_pct (avant = années < reference_year)
+        - 'reference_year'
+        """
+        if reference_year is None:
+            reference_year = self.reference_year
+        
+        indicators = [col for col in df.columns if col != 'Annee']
+        years = df['Annee'].to_numpy()
+        values = df[indicators].to_numpy(dtype=float)
+        first, last = values[0], values[-1]
+        n_periods = max(len(values) - 1, 1)
+        before_mask = years < reference_year
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            yoy = (values[1:] - values[:-1]) / values[:-1] * 100
+            growth = (last - first) / first * 100
+            cagr = np.where((first > 0) & (last > 0),
+                            ((last / first) ** (1 / n_periods) - 1) * 100, np.nan)
+            before = (values[before_mask].mean(axis=0) if before_mask.any()
+                      else np.full(len(indicators), np.nan))
+            after = (values[~before_mask].mean(axis=0) if (~before_mask).any()
+                     else np.full(len(indicators), np.nan))
+            delta = after - before
+            delta_pct = delta / before * 100
+        
+        yoy_df = pd.DataFrame(np.vstack([np.full(len(indicators), np.nan), yoy]),
+                              columns=indicators, index=pd.Index(years, name='Annee'))
+        summary = pd.DataFrame({
+            'premier': first,
+            'dernier': last,
+            'croissance_pct': growth,
+            'cagr_pct': cagr,
+            'moyenne': values.mean(axis=0),
+            'somme': values.sum(axis=0),
+            'moyenne_avant': before,
+            'moyenne_apres': after,
+            'delta': delta,
+            'delta_pct': delta_pct,
+        }, index=pd.Index(indicators, name='Indicateur'))
+        
+        return {'yoy': yoy_df, 'summary': summary, 'reference_year': reference_year}
+    
+    def create_army_analysis(self, df, render=None, show=True, writer=None, output_dir=None):
+        """Crée une analyse complète de l'intégration militaire européenne
+        
+        Sans option `render`, le poster PNG à 300 dpi est enregistré comme
+        auparavant. Avec `render` (dict surchargeant RENDER_DEFAULTS), la figure
+        est rastérisée une seule fois puis déclinée en vignette, PNG intermédiaire,
+        tuiles par panneau et formats vectoriels. Avec `writer` (army_io.AsyncWriter),
+        la figure est d'abord affichée, puis tous les encodages et écritures
+        (poster ou sorties multi-résolution) sont confiés aux threads d'écriture.
+        Les fichiers sont écrits dans `output_dir` (répertoire courant par défaut).
+        """
+        metrics = self.compute_derived_metrics(df)
+        
         plt.style.use('seaborn-v0_8')
         fig = plt.figure(figsize=(20, 24))
         
@@ -722,16 +808,140 @@ class EuropeanArmyAnalyzer:
         
         # 8. Comparaison avant/après intégration
         ax8 = plt.subplot(4, 2, 8)
-        self._plot_before_after_comparison(df, ax8)
+        self._plot_before_after_comparison(df, ax8, metrics)
         
         plt.suptitle(f'Analyse de l\'Intégration Militaire Européenne - {self.country_component} ({self.start_year}-{self.end_year})', 
                     fontsize=16, fontweight='bold')
         plt.tight_layout()
-        plt.savefig(f'{self.country_component}_army_integration_analysis.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        
+        base_name = os.path.join(output_dir or '', f'{self.country_component}_army_integration_analysis')
+        panels = {
+            "budget_personnel": ax1, "cooperation": ax2, "capacites": ax3,
+            "interoperabilite": ax4, "efficacite": ax5, "specialisations": ax6,
+            "temps_reaction": ax7, "avant_apres": ax8,
+        }
+        if writer is None:
+            if render is None:
+                plt.savefig(f'{base_name}.png', dpi=300, bbox_inches='tight')
+                outputs = {"poster": f'{base_name}.png'}
+            else:
+                outputs = self._save_render_outputs(fig, panels, base_name, render)
+            if show:
+                plt.show()
+        else:
+            # Affichage d'abord : la figure est ensuite confiée aux threads d'écriture
+            if show:
+                plt.show()
+            if render is None:
+                outputs = {"poster": writer.submit_figure(fig, f'{base_name}.png', dpi=300,
+                                                          bbox_inches='tight')}
+            else:
+                outputs = self._save_render_outputs(fig, panels, base_name, render, writer)
         
         # Générer les insights
-        self._generate_army_insights(df)
+        self._generate_army_insights(df, metrics)
+        
+        return outputs
+    
+    def _save_render_outputs(self, fig, panels, base_name, render, writer=None):
+        """Enregistre les sorties multi-résolution à partir d'un seul rendu raster
+        
+        Avec `writer` (army_io.AsyncWriter), tout le tracé matplotlib (rendu Agg,
+        SVG/PDF en mémoire) reste dans le thread appelant : matplotlib ne permet
+        pas de tracer depuis plusieurs threads. Seuls les encodages PNG et
+        l'écriture des octets vectoriels sont confiés aux threads d'écriture.
+        """
+        from PIL import Image
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.transforms import Bbox
+        
+        options = dict(RENDER_DEFAULTS)
+        options.update(render)
+        
+        # Un seul rendu Agg à la plus haute résolution demandée
+        raster_dpi = options["poster_dpi"] if options["poster"] else options["medium_dpi"]
+        original_dpi = fig.dpi
+        fig.set_dpi(raster_dpi)
+        canvas = fig.canvas if hasattr(fig.canvas, 'buffer_rgba') else FigureCanvasAgg(fig)
+        canvas.draw()
+        renderer = canvas.get_renderer()
+        image = Image.fromarray(np.asarray(canvas.buffer_rgba())).convert('RGB')
+        
+        # Recadrage équivalent à bbox_inches='tight' (marge de 0.1 pouce)
+        tight = fig.get_tightbbox(renderer).padded(0.1)
+        crop = self._pixel_box(tight.transformed(fig.dpi_scale_trans), image)
+        
+        # Boîtes des panneaux (axes jumeaux inclus), calculées avant de restaurer le dpi
+        panel_boxes = {}
+        if options["tiles"]:
+            for key, ax in panels.items():
+                siblings = [other for other in fig.axes
+                            if other.get_position().bounds == ax.get_position().bounds]
+                bbox = Bbox.union([other.get_tightbbox(renderer) for other in siblings])
+                panel_boxes[key] = self._pixel_box(bbox, image)
+        fig.set_dpi(original_dpi)
+        
+        png_options = {"compress_level": options["png_compress_level"],
+                       "optimize": options["png_optimize"]}
+        scale = options["medium_dpi"] / raster_dpi
+        outputs = {}
+        
+        def _save_png(img, path):
+            if writer is None:
+                img.save(path, format='PNG', **png_options)
+            else:
+                writer.submit(path, lambda tmp_path: img.save(tmp_path, format='PNG', **png_options))
+        
+        def _resize(img):
+            if scale == 1:
+                return img
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            return img.resize(size, Image.LANCZOS)
+        
+        full = image.crop(crop)
+        if options["poster"]:
+            outputs["poster"] = f'{base_name}.png'
+            _save_png(full, outputs["poster"])
+        
+        medium = _resize(full)
+        outputs["medium"] = f'{base_name}_medium.png'
+        _save_png(medium, outputs["medium"])
+        
+        thumbnail = medium.copy()
+        thumbnail.thumbnail(tuple(options["thumbnail_size"]), Image.LANCZOS)
+        if options["thumbnail_colors"]:
+            thumbnail = thumbnail.quantize(colors=options["thumbnail_colors"])
+        outputs["thumbnail"] = f'{base_name}_thumb.png'
+        _save_png(thumbnail, outputs["thumbnail"])
+        
+        if panel_boxes:
+            outputs["tiles"] = {}
+            for key, box in panel_boxes.items():
+                path = f'{base_name}_{key}.png'
+                _save_png(_resize(image.crop(box)), path)
+                outputs["tiles"][key] = path
+        
+        # Sorties vectorielles (rendu propre à chaque format)
+        for fmt in options["vector_formats"]:
+            path = f'{base_name}.{fmt}'
+            if writer is None:
+                fig.savefig(path, format=fmt, bbox_inches='tight')
+            else:
+                buffer = io.BytesIO()
+                fig.savefig(buffer, format=fmt, bbox_inches='tight')
+                writer.submit_bytes(buffer.getvalue(), path)
+            outputs[fmt] = path
+        
+        return outputs
+    
+    @staticmethod
+    def _pixel_box(bbox, image):
+        """Convertit une Bbox en pixels d'affichage en boîte de recadrage PIL"""
+        left = max(0, int(np.floor(bbox.x0)))
+        right = min(image.width, int(np.ceil(bbox.x1)))
+        upper = max(0, int(np.floor(image.height - bbox.y1)))
+        lower = min(image.height, int(np.ceil(image.height - bbox.y0)))
+        return (left, upper, right, lower)
     
     def _plot_budget_personnel(self, df, ax):
         """Plot de l'évolution des budgets et effectifs"""
@@ -852,24 +1062,25 @@ class EuropeanArmyAnalyzer:
         ax.legend()
         ax.grid(True, alpha=0.3)
     
-    def _plot_before_after_comparison(self, df, ax):
+    def _plot_before_after_comparison(self, df, ax, metrics=None):
         """Plot de comparaison avant/après intégration"""
-        # Calculer les moyennes avant et après 2017
-        before_integration = df[df['Annee'] < 2017].mean()
-        after_integration = df[df['Annee'] >= 2017].mean()
+        if metrics is None:
+            metrics = self.compute_derived_metrics(df)
+        summary = metrics['summary']
+        reference_year = metrics['reference_year']
         
         # Sélectionner les indicateurs à comparer
         indicators = ['Interoperabilite', 'Capacite_Projection', 'Efficacite_Operative', 'Economies_Echelle']
         labels = ['Interopérabilité', 'Projection', 'Efficacité', 'Économies']
         
-        before_values = [before_integration[ind] for ind in indicators]
-        after_values = [after_integration[ind] for ind in indicators]
+        before_values = summary.loc[indicators, 'moyenne_avant'].to_numpy()
+        after_values = summary.loc[indicators, 'moyenne_apres'].to_numpy()
         
         x = np.arange(len(indicators))
         width = 0.35
         
-        ax.bar(x - width/2, before_values, width, label='Avant 2017', color='#0055A4', alpha=0.7)
-        ax.bar(x + width/2, after_values, width, label='Après 2017', color='#FF0000', alpha=0.7)
+        ax.bar(x - width/2, before_values, width, label=f'Avant {reference_year}', color='#0055A4', alpha=0.7)
+        ax.bar(x + width/2, after_values, width, label=f'Après {reference_year}', color='#FF0000', alpha=0.7)
         
         ax.set_title('Comparaison Avant/Après Intégration Renforcée', fontsize=12, fontweight='bold')
         ax.set_ylabel('Valeurs moyennes')
@@ -878,102 +1089,112 @@ class EuropeanArmyAnalyzer:
         ax.legend()
         ax.grid(True, alpha=0.3, axis='y')
     
-    def _generate_army_insights(self, df):
-        """Génère des insights analytiques sur l'intégration militaire"""
-        print(f"🇪🇺 INSIGHTS ANALYTIQUES - Intégration Militaire Européenne - {self.country_component}")
-        print("=" * 80)
+    def collect_army_insights(self, df, metrics=None):
+        """Insights analytiques sous forme structurée (rapports, tableaux)
+        
+        Retourne une liste de sections {'titre', 'type', 'lignes'} : pour le
+        type 'mesures', les lignes sont des couples (libellé, valeur formatée) ;
+        pour le type 'liste', de simples chaînes.
+        """
+        if metrics is None:
+            metrics = self.compute_derived_metrics(df)
+        summary = metrics['summary']
         
         # 1. Statistiques de base
-        print("\n1. 📊 IMPACT OPÉRATIONNEL:")
-        interop_growth = ((df['Interoperabilite'].iloc[-1] - 
-                          df['Interoperabilite'].iloc[0]) / 
-                          df['Interoperabilite'].iloc[0]) * 100
-        capability_growth = ((df['Capacite_Projection'].iloc[-1] - 
-                             df['Capacite_Projection'].iloc[0]) / 
-                             df['Capacite_Projection'].iloc[0]) * 100
-        
-        print(f"Amélioration de l'interopérabilité ({self.start_year}-{self.end_year}): {interop_growth:.1f}%")
-        print(f"Amélioration de la capacité de projection: {capability_growth:.1f}%")
-        print(f"Temps de réaction moyen: {df['Temps_Reaction'].mean():.1f} jours")
+        operationnel = [
+            (f"Amélioration de l'interopérabilité ({self.start_year}-{self.end_year})",
+             f"{summary.loc['Interoperabilite', 'croissance_pct']:.1f}%"),
+            ("Amélioration de la capacité de projection",
+             f"{summary.loc['Capacite_Projection', 'croissance_pct']:.1f}%"),
+            ("Temps de réaction moyen", f"{summary.loc['Temps_Reaction', 'moyenne']:.1f} jours"),
+        ]
         
         # 2. Impact économique
-        print("\n2. 💰 IMPACT ÉCONOMIQUE:")
-        total_savings = df['Economies_Echelle'].sum()
-        
-        print(f"Économies d'échelle totales: {total_savings:.2f} Md€")
-        print(f"Réduction moyenne des doublons: {df['Reduction_Doublons'].mean():.1f}%")
-        
+        economique = [
+            ("Économies d'échelle totales", f"{summary.loc['Economies_Echelle', 'somme']:.2f} Md€"),
+            ("Réduction moyenne des doublons", f"{summary.loc['Reduction_Doublons', 'moyenne']:.1f}%"),
+        ]
         # Ajouter les indicateurs spécifiques aux pays/union
         if self.config["type"] in ["pays_ue", "union"]:
-            if 'Budget_Defense' in df.columns:
-                budget_growth = ((df['Budget_Defense'].iloc[-1] - 
-                                 df['Budget_Defense'].iloc[0]) / 
-                                 df['Budget_Defense'].iloc[0]) * 100
-                print(f"Croissance du budget défense: {budget_growth:.1f}%")
+            if 'Budget_Defense' in summary.index:
+                economique.append(("Croissance du budget défense",
+                                   f"{summary.loc['Budget_Defense', 'croissance_pct']:.1f}%"))
         
         # 3. Coopération européenne
-        print("\n3. 🤝 COOPÉRATION EUROPÉENNE:")
-        pesco_growth = ((df['Projets_PESCO'].iloc[-1] - 
-                        df['Projets_PESCO'].iloc[0]) / 
-                        df['Projets_PESCO'].iloc[0]) * 100
-        exercises_growth = ((df['Exercices_Communs'].iloc[-1] - 
-                           df['Exercices_Communs'].iloc[0]) / 
-                           df['Exercices_Communs'].iloc[0]) * 100
-        
-        print(f"Augmentation des projets PESCO: {pesco_growth:.1f}%")
-        print(f"Augmentation des exercices communs: {exercises_growth:.1f}%")
+        cooperation = [
+            ("Augmentation des projets PESCO", f"{summary.loc['Projets_PESCO', 'croissance_pct']:.1f}%"),
+            ("Augmentation des exercices communs", f"{summary.loc['Exercices_Communs', 'croissance_pct']:.1f}%"),
+        ]
         
         # 4. Spécificités du pays/composante
-        print(f"\n4. 🌟 SPÉCIFICITÉS DE {self.country_component.upper()}:")
-        print(f"Type: {self.config['type']}")
+        specificites = [("Type", self.config['type'])]
         if self.config["type"] in ["pays_ue", "union"]:
-            print(f"Spécialisations: {', '.join(self.config.get('specialisations', []))}")
-            print(f"Équipements communs: {', '.join(self.config.get('equipements_communs', []))}")
+            specificites.append(("Spécialisations", ', '.join(self.config.get('specialisations', []))))
+            specificites.append(("Équipements communs", ', '.join(self.config.get('equipements_communs', []))))
         elif self.config["type"] == "composante":
-            print(f"Pays contributeurs: {', '.join(self.config.get('pays_contributeurs', []))}")
-            print(f"Équipements clés: {', '.join(self.config.get('equipements_cles', []))}")
+            specificites.append(("Pays contributeurs", ', '.join(self.config.get('pays_contributeurs', []))))
+            specificites.append(("Équipements clés", ', '.join(self.config.get('equipements_cles', []))))
         
         # 5. Événements marquants
-        print("\n5. 📅 ÉVÉNEMENTS MARQUANTS:")
-        print("• 2017: Lancement de PESCO (Coopération structurée permanente)")
-        print("• 2017-2019: Mise en place des premiers projets communs")
-        print("• 2020: Impact de la pandémie COVID-19 sur les exercices")
-        print("• 2021-2022: Reprise et accélération de l'intégration")
-        print("• 2023-2027: Plein effet des projets et maturation des capacités")
+        evenements = [
+            "2017: Lancement de PESCO (Coopération structurée permanente)",
+            "2017-2019: Mise en place des premiers projets communs",
+            "2020: Impact de la pandémie COVID-19 sur les exercices",
+            "2021-2022: Reprise et accélération de l'intégration",
+            "2023-2027: Plein effet des projets et maturation des capacités",
+        ]
         
         # 6. Recommandations stratégiques
-        print("\n6. 💡 RECOMMANDATIONS STRATÉGIQUES:")
+        recommandations = []
         if self.config["type"] in ["pays_ue", "union"]:
-            print("• Poursuivre l'harmonisation des équipements et doctrines")
-            print("• Développer les capacités de projection communes")
-            print("• Renforcer la coopération en matière de cyberdéfense")
-            print("• Augmenter les exercices interarmées multinationaux")
+            recommandations += ["Poursuivre l'harmonisation des équipements et doctrines",
+                                "Développer les capacités de projection communes",
+                                "Renforcer la coopération en matière de cyberdéfense",
+                                "Augmenter les exercices interarmées multinationaux"]
         elif self.config["type"] == "composante":
-            print("• Standardiser les équipements et procédures")
-            print("• Développer des centres d'excellence spécialisés")
-            print("• Renforcer l'interopérabilité des systèmes de commandement")
-            print("• Créer des brigades multinationales permanentes")
+            recommandations += ["Standardiser les équipements et procédures",
+                                "Développer des centres d'excellence spécialisés",
+                                "Renforcer l'interopérabilité des systèmes de commandement",
+                                "Créer des brigades multinationales permanentes"]
         
         # Recommandations spécifiques selon les spécialisations
         if self.config["type"] in ["pays_ue", "union"] and "cyberdefense" in self.config.get("specialisations", []):
-            print("• Développer un commandement cyber européen intégré")
-            print("• Investir dans la formation et le recrutement de experts cyber")
+            recommandations += ["Développer un commandement cyber européen intégré",
+                                "Investir dans la formation et le recrutement de experts cyber"]
         if self.config["type"] in ["pays_ue", "union"] and "renseignement" in self.config.get("specialisations", []):
-            print("• Renforcer le partage du renseignement en temps réel")
-            print("• Créer des centres d'analyse communs")
+            recommandations += ["Renforcer le partage du renseignement en temps réel",
+                                "Créer des centres d'analyse communs"]
         if self.config["type"] in ["pays_ue", "union"] and "force_nucleaire" in self.config.get("specialisations", []):
-            print("• Développer une doctrine de dissuasion concertée")
-            print("• Renforcer le dialogue stratégique européen")
+            recommandations += ["Développer une doctrine de dissuasion concertée",
+                                "Renforcer le dialogue stratégique européen"]
+        
+        return [
+            {"titre": "📊 IMPACT OPÉRATIONNEL", "type": "mesures", "lignes": operationnel},
+            {"titre": "💰 IMPACT ÉCONOMIQUE", "type": "mesures", "lignes": economique},
+            {"titre": "🤝 COOPÉRATION EUROPÉENNE", "type": "mesures", "lignes": cooperation},
+            {"titre": f"🌟 SPÉCIFICITÉS DE {self.country_component.upper()}", "type": "mesures",
+             "lignes": specificites},
+            {"titre": "📅 ÉVÉNEMENTS MARQUANTS", "type": "liste", "lignes": evenements},
+            {"titre": "💡 RECOMMANDATIONS STRATÉGIQUES", "type": "liste", "lignes": recommandations},
+        ]
+    
+    def _generate_army_insights(self, df, metrics=None):
+        """Génère des insights analytiques sur l'intégration militaire"""
+        print(f"🇪🇺 INSIGHTS ANALYTIQUES - Intégration Militaire Européenne - {self.country_component}")
+        print("=" * 80)
+        
+        for i, section in enumerate(self.collect_army_insights(df, metrics), 1):
+            print(f"\n{i}. {section['titre']}:")
+            for ligne in section['lignes']:
+                if section['type'] == 'mesures':
+                    print(f"{ligne[0]}: {ligne[1]}")
+                else:
+                    print(f"• {ligne}")
 
 def main():
     """Fonction principale pour l'analyse de l'intégration militaire européenne"""
     # Liste des pays et composantes à analyser
-    options = [
-        "Allemagne", "Autriche", "Belgique", "Bulgarie", "Chypre", "Croatie", "Danemark", "Espagne",
-        "Estonie", "Finlande", "France", "Grece", "Hongrie", "Irlande", "Italie", "Lettonie", "Lituanie",
-        "Luxembourg", "Malte", "Pays-Bas", "Pologne", "Portugal", "Republique Tcheque", "Roumanie",
-        "Slovaquie", "Slovenie", "Suede", "UE-27", "Forces Terrestres", "Forces Maritimes", "Forces Aeriennes"
-    ]
+    options = ENTITES
     
     print("🇪🇺 ANALYSE DE L'INTÉGRATION MILITAIRE EUROPÉENNE (2017-2027)")
     print("=" * 70)
@@ -995,13 +1216,17 @@ def main():
     # Initialiser l'analyseur
     analyzer = EuropeanArmyAnalyzer(option_selectionnee)
     
+    # Écritures disque en arrière-plan (CSV, poster PNG)
+    from army_io import AsyncWriter
+    writer = AsyncWriter()
+    
     # Générer les données
     army_data = analyzer.generate_army_data()
     
     # Sauvegarder les données
     output_file = f'{option_selectionnee}_army_integration_data_2017_2027.csv'
-    army_data.to_csv(output_file, index=False)
-    print(f"💾 Données sauvegardées: {output_file}")
+    writer.submit_csv(army_data, output_file)
+    print(f"💾 Sauvegarde des données programmée: {output_file}")
     
     # Aperçu des données
     print("\n👀 Aperçu des données:")
@@ -1010,7 +1235,12 @@ def main():
     
     # Créer l'analyse
     print("\n📈 Création de l'analyse d'intégration militaire...")
-    analyzer.create_army_analysis(army_data)
+    analyzer.create_army_analysis(army_data, writer=writer)
+    
+    summary = writer.close()
+    for path, error in summary['echecs'].items():
+        print(f"❌ Échec d'écriture {path}: {error}")
+    print(f"💾 {len(summary['ecrits'])} fichier(s) écrit(s)")
     
     print(f"\n✅ Analyse pour {option_selectionnee} terminée!")
     print(f"📊 Période: {analyzer.start_year}-{analyzer.end_year}")
@@ -0,0 +1,294 @@
+"""Graphe de construction des artefacts avec vérification de fraîcheur (à la make)
+
+Chaque artefact (CSV de données, figure, rapport d'insights, agrégat des membres) est
+une cible dont la signature est l'empreinte de ses entrées : configuration de
+l'entité, paramètres, table d'événements, version du code concerné et contenu
+des données amont. Une cible n'est reconstruite que si sa signature a changé ou
+si l'un de ses fichiers manque ; les cibles indépendantes sont construites en
+parallèle dans un pool de processus.
+
+Usage :
+    python3 army_build.py                      # toutes les entités
+    python3 army_build.py France Allemagne -j 4
+    python3 army_build.py --force
+"""
+import argparse
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from Army import ENTITES, RENDER_DEFAULTS, EuropeanArmyAnalyzer
+from army_io import atomic_write
+from army_scenarios import EVENEMENTS
+
+ETAT_BUILD = '.army_build_state.json'
+
+# Agrégation des pays membres : somme pour les grandeurs extensives, moyenne sinon
+COLONNES_SOMMEES = ['Budget_Defense', 'Personnel', 'Projets_PESCO',
+                    'Exercices_Communs', 'Economies_Echelle']
+
+
+def digest(value):
+    """Empreinte SHA-256 d'une valeur sérialisable en JSON"""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def code_version(*methods):
+    """Empreinte du source des méthodes de EuropeanArmyAnalyzer utilisées par une cible
+
+    Le registre (_get_country_component_config) est exclu : il est pris en compte
+    entité par entité via la configuration, pour ne reconstruire que les
+    entités modifiées.
+    """
+    sources = [inspect.getsource(getattr(EuropeanArmyAnalyzer, name)) for name in methods]
+    return digest(sources)
+
+
+CODE_DONNEES = ['__init__', 'generate_army_data', '_add_integration_trends'] + sorted(
+    name for name in vars(EuropeanArmyAnalyzer) if name.startswith('_simulate_'))
+CODE_METRIQUES = ['compute_derived_metrics']
+CODE_FIGURE = CODE_METRIQUES + ['create_army_analysis', '_save_render_outputs', '_pixel_box'] + sorted(
+    name for name in vars(EuropeanArmyAnalyzer) if name.startswith('_plot_'))
+CODE_INSIGHTS = CODE_METRIQUES + ['collect_army_insights', '_generate_army_insights']
+
+
+class Target:
+    """Cible du graphe : action picklable, entrées signées et dépendances"""
+
+    def __init__(self, name, outputs, action, args, inputs, deps=()):
+        self.name = name
+        self.outputs = list(outputs)
+        self.action = action
+        self.args = args
+        self.inputs = inputs
+        self.deps = list(deps)
+
+    def signature(self, upstream):
+        """Empreinte des entrées et des fichiers produits par les dépendances"""
+        return digest({"inputs": self.inputs,
+                        "upstream": {dep.name: upstream[dep.name] for dep in self.deps}})
+
+
+def _data_path(entity):
+    return f'{entity}_army_integration_data_2017_2027.csv'
+
+
+def _build_data(entity, path):
+    analyzer = EuropeanArmyAnalyzer(entity)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = analyzer.generate_army_data()
+    df.to_csv(path, index=False)
+    return [path]
+
+
+def _build_figure(entity, data_path, render):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    analyzer = EuropeanArmyAnalyzer(entity)
+    df = pd.read_csv(data_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs = analyzer.create_army_analysis(df, render=render, show=False)
+    plt.close('all')
+    paths = []
+    for value in outputs.values():
+        paths += list(value.values()) if isinstance(value, dict) else [value]
+    return paths
+
+
+def _build_insights(entity, data_path, path):
+    analyzer = EuropeanArmyAnalyzer(entity)
+    df = pd.read_csv(data_path)
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        analyzer._generate_army_insights(df)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(buffer.getvalue())
+    return [path]
+
+
+def _build_aggregate(data_paths, path):
+    frames = [pd.read_csv(data_path) for data_path in data_paths]
+    combined = pd.concat(frames, ignore_index=True)
+    columns = [col for col in combined.columns if col != 'Annee']
+    grouped = combined.groupby('Annee')
+    aggregate = pd.concat([grouped[[c for c in columns if c in COLONNES_SOMMEES]].sum(),
+                           grouped[[c for c in columns if c not in COLONNES_SOMMEES]].mean()],
+                          axis=1)[columns].reset_index()
+    aggregate.to_csv(path, index=False)
+    return [path]
+
+
+def _aggregate_label(members):
+    """Nom de l'agrégat : 'UE-27' pour tous les membres, sinon d'après les membres retenus"""
+    all_members = [e for e in ENTITES if EuropeanArmyAnalyzer(e).config["type"] == "pays_ue"]
+    if sorted(members) == sorted(all_members):
+        return 'UE-27'
+    if len(members) <= 4:
+        return '-'.join(members)
+    return f'{len(members)}_membres_{digest(sorted(members))[:8]}'
+
+
+def build_graph(entities=None, render=None, aggregate=True):
+    """Construit la liste des cibles (données, figure, insights par entité, agrégat des membres)
+
+    L'agrégat ne s'appelle 'UE-27' que si le graphe contient les 27 membres ;
+    sinon il est nommé d'après les membres retenus (voir _aggregate_label).
+    """
+    entities = list(entities or ENTITES)
+    events = digest(EVENEMENTS)
+    code_data = code_version(*CODE_DONNEES)
+    code_figure = code_version(*CODE_FIGURE)
+    code_insights = code_version(*CODE_INSIGHTS)
+    render_options = None if render is None else {**RENDER_DEFAULTS, **render}
+    # Les actions définissent ce qui est écrit : leur source fait partie des entrées
+    action_code = {action: digest(inspect.getsource(action))
+                   for action in (_build_data, _build_figure, _build_insights, _build_aggregate)}
+
+    targets, data_targets = [], {}
+    for entity in entities:
+        analyzer = EuropeanArmyAnalyzer(entity)
+        params = {"start_year": analyzer.start_year, "end_year": analyzer.end_year,
+                  "reference_year": analyzer.reference_year}
+        config = analyzer.config
+
+        data = Target(f'{entity}:donnees', [_data_path(entity)], _build_data,
+                      (entity, _data_path(entity)),
+                      {"config": config, "params": params, "events": events,
+                       "code": [code_data, action_code[_build_data]]})
+        figure = Target(f'{entity}:figure', [], _build_figure,
+                        (entity, _data_path(entity), render),
+                        {"config": config, "params": params, "render": render_options,
+                         "code": [code_figure, action_code[_build_figure]]}, deps=[data])
+        insights_path = f'{entity}_army_integration_insights.txt'
+        insights = Target(f'{entity}:insights', [insights_path], _build_insights,
+                          (entity, _data_path(entity), insights_path),
+                          {"config": config, "params": params,
+                           "code": [code_insights, action_code[_build_insights]]}, deps=[data])
+        targets += [data, figure, insights]
+        data_targets[entity] = data
+
+    members = [e for e in entities if EuropeanArmyAnalyzer(e).config["type"] == "pays_ue"]
+    if aggregate and members:
+        label = _aggregate_label(members)
+        path = f'{label}_army_integration_aggregate_2017_2027.csv'
+        deps = [data_targets[e] for e in members]
+        targets.append(Target(f'{label}:agregat', [path], _build_aggregate,
+                              ([dep.outputs[0] for dep in deps], path),
+                              {"membres": members, "colonnes_sommees": COLONNES_SOMMEES,
+                               "code": action_code[_build_aggregate]},
+                              deps=deps))
+    return targets
+
+
+def load_state(path):
+    """État JSON enregistré par save_state ({} si absent)"""
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state, path):
+    """Enregistre un état JSON de façon atomique"""
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=1, ensure_ascii=False)
+    atomic_write(path, write)
+
+
+def run_build(targets, jobs=None, force=False, state_path=ETAT_BUILD):
+    """Construit les cibles périmées, en parallèle dès que leurs dépendances sont prêtes
+
+    Retourne un résumé {'construites': [...], 'a_jour': [...], 'echecs': {nom: erreur},
+    'ignorees': [...]} ; les cibles dont une dépendance a échoué sont ignorées.
+    """
+    state = load_state(state_path)
+    upstream = {}  # nom de cible -> empreinte de ses fichiers produits
+    summary = {'construites': [], 'a_jour': [], 'echecs': {}, 'ignorees': []}
+    pending = {target.name: target for target in targets}
+    running = {}
+
+    def _record(target, outputs, signature):
+        state[target.name] = {"signature": signature, "outputs": outputs}
+        upstream[target.name] = digest({path: _file_digest(path) for path in outputs})
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            progressed = False
+            for name, target in list(pending.items()):
+                dep_names = [dep.name for dep in target.deps]
+                if any(dep in summary['echecs'] or dep in summary['ignorees'] for dep in dep_names):
+                    summary['ignorees'].append(name)
+                    del pending[name]
+                    progressed = True
+                    continue
+                if not all(dep in upstream for dep in dep_names):
+                    continue
+                del pending[name]
+                progressed = True
+                signature = target.signature(upstream)
+                previous = state.get(name, {})
+                if (not force and previous.get("signature") == signature
+                        and all(os.path.exists(path) for path in previous.get("outputs", []))):
+                    _record(target, previous["outputs"], signature)
+                    summary['a_jour'].append(name)
+                    continue
+                running[pool.submit(target.action, *target.args)] = (target, signature)
+
+            if not running:
+                if not progressed and pending:
+                    raise ValueError(f"Dépendances introuvables: {sorted(pending)}")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                target, signature = running.pop(future)
+                try:
+                    outputs = future.result()
+                except Exception as exc:
+                    summary['echecs'][target.name] = repr(exc)
+                    state.pop(target.name, None)
+                    print(f"  ✗ {target.name}: {exc!r}")
+                    continue
+                _record(target, outputs, signature)
+                summary['construites'].append(target.name)
+                print(f"  ✓ {target.name}")
+            save_state(state, state_path)
+
+    save_state(state, state_path)
+    return summary
+
+
+def main():
+    """Construit les artefacts des entités demandées (toutes par défaut)"""
+    parser = argparse.ArgumentParser(description="Construction incrémentale des artefacts d'analyse")
+    parser.add_argument('entites', nargs='*', help="Entités à construire (toutes par défaut)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Processus parallèles")
+    parser.add_argument('--force', action='store_true', help="Reconstruire toutes les cibles")
+    args = parser.parse_args()
+
+    targets = build_graph(args.entites or None)
+    print(f"🇪🇺 Construction de {len(targets)} cibles...")
+    summary = run_build(targets, jobs=args.jobs, force=args.force)
+    print(f"\n✅ {len(summary['construites'])} construite(s), {len(summary['a_jour'])} à jour, "
+          f"{len(summary['echecs'])} échec(s), {len(summary['ignorees'])} ignorée(s)")
+
+
+if __name__ == "__main__":
+    main()
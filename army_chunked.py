@@ -0,0 +1,305 @@
+"""Exécution hors mémoire par blocs (entité x scénarios) pour les grands balayages
+
+Le travail est découpé en blocs entité x scénarios dont la taille est fixée par
+un budget mémoire unique. Chaque bloc est évalué avec le noyau de scénarios
+(compilé à partir des mêmes courbes que `generate_army_data`, vérifié contre lui
+pour chaque entité), puis réduit en agrégats partiels fusionnables :
+
+- effectif, moyenne et somme des carrés des écarts (fusion de Chan/Welford) ;
+- minimum et maximum exacts ;
+- histogramme à bornes fixes par (pas de temps, indicateur) pour les quantiles.
+
+Les agrégats partiels sont écrits sur disque (.npz) puis fusionnés à la fin ;
+la mémoire de pointe est donc celle d'un bloc (plus les histogrammes, de taille
+fixe, déduits du budget), quel que soit le nombre total de scénarios. Les quantiles sont exacts à une largeur de classe près
+(étendue pilote / N_CLASSES).
+"""
+import contextlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from Army import ENTITES, EuropeanArmyAnalyzer
+from army_io import atomic_write
+from army_scenarios import compile_entity_model, draw_scenario_parameters, run_scenarios
+
+TAILLE_TIRAGE = 4096   # Scénarios par bloc de tirage (graine propre, indépendante du budget)
+N_CLASSES = 512        # Classes d'histogramme par (pas de temps, indicateur)
+SURCOUT_MEMOIRE = 4    # Tableaux (S, T, K) simultanés lors de l'évaluation d'un bloc
+# Histogrammes (T, K, N_CLASSES) simultanés : agrégat fusionné, agrégat du bloc,
+# agrégat relu et tableau temporaire de np.bincount
+HISTOGRAMMES_SIMULTANES = 4
+QUANTILES = (5, 50, 95)
+
+
+def time_steps(model, pas):
+    """Pas de temps en années décimales : 'annuel' ou 'mensuel'"""
+    if pas == 'annuel':
+        return model.years
+    if pas == 'mensuel':
+        n_months = (model.end_year - model.start_year + 1) * 12
+        return model.start_year + np.arange(n_months) / 12
+    raise ValueError(f"Pas de temps inconnu: {pas}")
+
+
+def _verify_against_reference(model, analyzer):
+    """Vérifie que le noyau reproduit generate_army_data pour le scénario unité"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = analyzer.generate_army_data()
+    unit = run_scenarios(model, np.ones((1, len(model.columns))),
+                         np.ones((1, len(model.event_names))))[0]
+    expected = df[model.columns].to_numpy(dtype=float)
+    if not np.allclose(unit, expected, rtol=1e-9, atol=1e-9):
+        raise ValueError(f"Le noyau de scénarios diverge de generate_army_data pour {model.entity}")
+
+
+def _draw_block(model, entity_seed, block, volatilite):
+    """Paramètres du bloc de tirage `block` d'une entité (reproductibles)
+
+    Le scénario de référence n'est conservé qu'une fois, dans le bloc 0.
+    """
+    seed = np.random.SeedSequence(entity_seed.entropy, spawn_key=entity_seed.spawn_key + (block,))
+    return draw_scenario_parameters(model, TAILLE_TIRAGE, volatilite, seed,
+                                    include_reference=block == 0)
+
+
+class RunningMoments:
+    """Effectif, moyenne, M2 (Welford, fusion de Chan), minimum et maximum par cellule
+
+    Base commune des agrégats fusionnables (PartialAggregate, army_sketches).
+    """
+
+    def __init__(self, shape):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+
+    def _update_moments(self, values):
+        """Ajoute un lot (S, ...) aux moments et extrêmes ; retourne S"""
+        n = values.shape[0]
+        if n == 0:
+            return 0
+        mean = values.mean(axis=0)
+        m2 = ((values - mean) ** 2).sum(axis=0)
+        self._merge_moments(n, mean, m2)
+        self.min = np.minimum(self.min, values.min(axis=0))
+        self.max = np.maximum(self.max, values.max(axis=0))
+        return n
+
+    def _merge_moments(self, n, mean, m2):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (n / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * n / total)
+        self.count = total
+
+    def _merge_from(self, other):
+        """Fusionne moments et extrêmes d'un autre agrégat ; False s'il est vide"""
+        if other.count == 0:
+            return False
+        self._merge_moments(other.count, other.mean, other.m2)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return True
+
+    def variance(self):
+        return self.m2 / max(self.count - 1, 1)
+
+    def std(self):
+        return np.sqrt(self.variance())
+
+
+class PartialAggregate(RunningMoments):
+    """Agrégats fusionnables par cellule (pas de temps x indicateur)"""
+
+    def __init__(self, edges_lo, edges_hi):
+        super().__init__(edges_lo.shape)
+        self.edges_lo = edges_lo
+        self.edges_hi = edges_hi
+        self.hist = np.zeros(edges_lo.shape + (N_CLASSES,), dtype=np.int64)
+
+    def update(self, values):
+        """Ajoute un bloc de valeurs de forme (S, T, K)"""
+        if not self._update_moments(values):
+            return
+
+        width = (self.edges_hi - self.edges_lo) / N_CLASSES
+        bins = np.floor((values - self.edges_lo) / width).astype(np.int64)
+        np.clip(bins, 0, N_CLASSES - 1, out=bins)
+        cells = np.arange(self.mean.size).reshape(self.mean.shape) * N_CLASSES
+        counts = np.bincount((bins + cells).ravel(), minlength=self.mean.size * N_CLASSES)
+        self.hist += counts.reshape(self.hist.shape)
+
+    def merge(self, other):
+        """Fusionne un autre agrégat construit sur les mêmes bornes"""
+        if self._merge_from(other):
+            self.hist += other.hist
+
+    def save(self, path):
+        np.savez(path, count=self.count, mean=self.mean, m2=self.m2, min=self.min,
+                 max=self.max, hist=self.hist, edges_lo=self.edges_lo, edges_hi=self.edges_hi)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            aggregate = cls(data['edges_lo'], data['edges_hi'])
+            aggregate.count = int(data['count'])
+            aggregate.mean = data['mean']
+            aggregate.m2 = data['m2']
+            aggregate.min = data['min']
+            aggregate.max = data['max']
+            aggregate.hist = data['hist']
+        return aggregate
+
+    def quantile(self, q):
+        """Quantile q (en %) interpolé dans l'histogramme, par cellule"""
+        target = q / 100 * self.count
+        cumulative = np.cumsum(self.hist, axis=-1)
+        bin_index = np.minimum((cumulative < target).sum(axis=-1), N_CLASSES - 1)
+        previous = np.take_along_axis(cumulative, bin_index[..., None], axis=-1)[..., 0]
+        in_bin = np.take_along_axis(self.hist, bin_index[..., None], axis=-1)[..., 0]
+        previous = previous - in_bin
+        width = (self.edges_hi - self.edges_lo) / N_CLASSES
+        low = np.maximum(self.edges_lo + bin_index * width, self.min)
+        high = np.minimum(self.edges_lo + (bin_index + 1) * width, self.max)
+        # Les classes extrêmes absorbent les valeurs hors étendue pilote
+        low = np.where(bin_index == 0, self.min, low)
+        high = np.where(bin_index == N_CLASSES - 1, self.max, high)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = np.where(in_bin > 0, (target - previous) / in_bin, 0.0)
+        return low + np.clip(fraction, 0, 1) * np.maximum(high - low, 0)
+
+
+def draw_range(model, entity_seed, first, last, volatilite):
+    """Paramètres des scénarios [first, last) à partir des blocs de tirage qui les couvrent"""
+    blocks = range(first // TAILLE_TIRAGE, (last - 1) // TAILLE_TIRAGE + 1)
+    draws = [_draw_block(model, entity_seed, b, volatilite) for b in blocks]
+    offset = blocks[0] * TAILLE_TIRAGE
+    growth = np.concatenate([g for g, _ in draws])[first - offset:last - offset]
+    intensity = np.concatenate([i for _, i in draws])[first - offset:last - offset]
+    return growth, intensity
+
+
+def plan_chunks(n_scenarios, n_steps, n_cols, budget_memoire_mo):
+    """Nombre de scénarios par bloc pour un budget mémoire en Mo
+
+    Les histogrammes des agrégats (taille fixe, indépendante du bloc) sont
+    déduits du budget avant de dimensionner les blocs.
+    """
+    histograms = HISTOGRAMMES_SIMULTANES * n_steps * n_cols * N_CLASSES * 8
+    budget = budget_memoire_mo * 1024 ** 2 - histograms
+    bytes_per_scenario = n_steps * n_cols * 8 * SURCOUT_MEMOIRE
+    if budget < bytes_per_scenario:
+        raise ValueError(f"Budget mémoire de {budget_memoire_mo} Mo insuffisant : les histogrammes "
+                         f"occupent à eux seuls {histograms / 1024 ** 2:.1f} Mo")
+    return int(min(budget // bytes_per_scenario, n_scenarios))
+
+
+def histogram_edges(model, entity_seed, n_scenarios, chunk, volatilite, steps):
+    """Bornes d'histogramme fixées par un échantillon pilote, élargies de moitié de chaque côté
+
+    Le pilote (premiers TAILLE_TIRAGE scénarios) est évalué par blocs de `chunk`
+    pour respecter le budget mémoire ; les bornes ne dépendent pas de `chunk`.
+    """
+    lo = np.full((len(steps), len(model.columns)), np.inf)
+    hi = np.full((len(steps), len(model.columns)), -np.inf)
+    n_pilot = min(TAILLE_TIRAGE, n_scenarios)
+    for first in range(0, n_pilot, chunk):
+        pilot = run_scenarios(model, *draw_range(model, entity_seed, first,
+                                                  min(first + chunk, n_pilot), volatilite),
+                              years=steps)
+        lo = np.minimum(lo, pilot.min(axis=0))
+        hi = np.maximum(hi, pilot.max(axis=0))
+    margin = np.maximum((hi - lo) * 0.5, 1e-9 * np.maximum(np.abs(hi), 1.0))
+    return lo - margin, hi + margin
+
+
+def stats_frame(name, steps, columns, merged):
+    """DataFrame long des statistiques d'un agrégat fusionné"""
+    stats = {'n': np.full(merged.mean.shape, merged.count), 'moyenne': merged.mean,
+             'ecart_type': merged.std(), 'min': merged.min, 'max': merged.max}
+    for q in QUANTILES:
+        stats[f'p{q}'] = merged.quantile(q)
+    frame = pd.DataFrame({key: value.ravel() for key, value in stats.items()})
+    frame.insert(0, 'Indicateur', np.tile(columns, len(steps)))
+    frame.insert(0, 'Pas', np.repeat(steps, len(columns)))
+    frame.insert(0, 'Entite', name)
+    return frame
+
+
+def run_chunked_sweep(entities=None, n_scenarios=100_000, volatilite=0.1, seed=0,
+                      pas='annuel', budget_memoire_mo=256, work_dir='army_sweep',
+                      indicateur_classement='Interoperabilite', verifier=True):
+    """Balayage hors mémoire : statistiques par entité, pas de temps et indicateur
+
+    Retourne un dict avec 'stats' (DataFrame long : Entite, Pas, Indicateur, n,
+    moyenne, ecart_type, min, max, p5, p50, p95) et 'classement' (entités triées
+    par moyenne finale de `indicateur_classement`). Les agrégats partiels de
+    chaque bloc sont écrits dans `work_dir` ; une relance avec le même plan
+    réutilise les blocs déjà calculés.
+    """
+    entities = list(entities or ENTITES)
+    os.makedirs(work_dir, exist_ok=True)
+    plan = {"entities": entities, "n_scenarios": n_scenarios, "volatilite": volatilite,
+            "seed": seed, "pas": pas, "budget_memoire_mo": budget_memoire_mo,
+            "taille_tirage": TAILLE_TIRAGE, "n_classes": N_CLASSES}
+    plan_path = os.path.join(work_dir, 'plan.json')
+    if os.path.exists(plan_path):
+        with open(plan_path) as f:
+            if json.load(f) != plan:
+                for name in os.listdir(work_dir):
+                    if name.endswith('.npz'):
+                        os.remove(os.path.join(work_dir, name))
+    with open(plan_path, 'w') as f:
+        json.dump(plan, f)
+    # Fichiers temporaires laissés par une exécution interrompue
+    for name in os.listdir(work_dir):
+        if name.endswith('.tmp.npz'):
+            os.remove(os.path.join(work_dir, name))
+
+    entity_seeds = np.random.SeedSequence(seed).spawn(len(entities))
+    print(f"🇪🇺 Balayage hors mémoire: {len(entities)} entités x {n_scenarios} scénarios ({pas})")
+
+    frames, final_means = [], {}
+    for e_index, (name, entity_seed) in enumerate(zip(entities, entity_seeds)):
+        analyzer = EuropeanArmyAnalyzer(name)
+        model = compile_entity_model(analyzer)
+        if verifier:
+            _verify_against_reference(model, analyzer)
+        steps = time_steps(model, pas)
+        chunk = plan_chunks(n_scenarios, len(steps), len(model.columns), budget_memoire_mo)
+
+        edges_lo, edges_hi = histogram_edges(model, entity_seed, n_scenarios, chunk, volatilite, steps)
+        paths = []
+        for c_index, first in enumerate(range(0, n_scenarios, chunk)):
+            path = os.path.join(work_dir, f'partiel_{e_index:03d}_{c_index:05d}.npz')
+            paths.append(path)
+            if os.path.exists(path):
+                continue
+            aggregate = PartialAggregate(edges_lo, edges_hi)
+            growth, intensity = draw_range(model, entity_seed, first,
+                                            min(first + chunk, n_scenarios), volatilite)
+            aggregate.update(run_scenarios(model, growth, intensity, years=steps))
+            # Écriture atomique : un bloc interrompu n'est jamais pris pour un bloc terminé
+            atomic_write(path, aggregate.save)
+
+        merged = PartialAggregate(edges_lo, edges_hi)
+        for path in paths:
+            merged.merge(PartialAggregate.load(path))
+
+        frames.append(stats_frame(name, steps, model.columns, merged))
+
+        if indicateur_classement in model.columns:
+            final_means[name] = merged.mean[-1, model.columns.index(indicateur_classement)]
+        print(f"  ✓ {name}: {len(paths)} bloc(s) de {chunk} scénarios")
+
+    ranking = (pd.Series(final_means, name=indicateur_classement)
+               .sort_values(ascending=indicateur_classement == 'Temps_Reaction')
+               .rename_axis('Entite').reset_index())
+    ranking.insert(0, 'Rang', np.arange(1, len(ranking) + 1))
+    return {'stats': pd.concat(frames, ignore_index=True), 'classement': ranking}
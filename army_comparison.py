@@ -0,0 +1,149 @@
+"""Comparaison de toutes les entités en petits multiples avec bandes Monte Carlo
+
+Une sous-figure par indicateur, une courbe par entité. Les séries et les bandes
+de chaque panneau sont dessinées en un seul LineCollection et un seul
+PolyCollection, de sorte que le coût de rendu ne dépend pas du nombre d'artistes
+Line2D (31 entités x 12 indicateurs).
+"""
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.lines import Line2D
+
+from Army import ENTITES, EuropeanArmyAnalyzer
+from army_scenarios import compile_entity_model, draw_scenario_parameters, run_scenarios
+
+STYLES_LIGNE = ['solid', 'dashed', 'dotted', 'dashdot']
+
+
+def _comparison_runs(entities, n_scenarios, volatilite, quantiles, seed):
+    """Référence et quantiles Monte Carlo par entité : {nom: (model, central, bas, haut)}
+
+    `model` n'est lu que pour ses attributs `columns` et `years`.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(entities))
+    runs = {}
+    for name, entity_seed in zip(entities, seeds):
+        model = compile_entity_model(name)
+        growth, intensity = draw_scenario_parameters(model, n_scenarios, volatilite, entity_seed)
+        values = run_scenarios(model, growth, intensity)
+        low, high = np.percentile(values, quantiles, axis=0)
+        runs[name] = (model, values[0], low, high)
+    return runs
+
+
+def _sketch_runs(sketches, entities, quantiles):
+    """Médiane et quantiles lus dans des résumés en flux (army_sketches)"""
+    runs = {}
+    for name in entities:
+        summary = sketches[name]
+        runs[name] = (summary, summary.quantile(50),
+                      summary.quantile(quantiles[0]), summary.quantile(quantiles[1]))
+    return runs
+
+
+def create_comparison_analysis(entities=None, indicators=None, n_scenarios=200,
+                               volatilite=0.1, quantiles=(5, 95), seed=0,
+                               ncols=3, render=None, show=True, sketches=None, output_dir=None):
+    """Crée la figure de comparaison de toutes les entités
+
+    `indicators` par défaut : tous les indicateurs présents chez au moins une
+    entité (hors contributions des composantes). Les bandes couvrent les
+    quantiles `quantiles` des `n_scenarios` scénarios. Avec `sketches`
+    ({entité: StreamingSummary}), courbes (médianes) et bandes sont lues
+    directement dans les résumés, sans réévaluer les scénarios. `render` et
+    `show` et `output_dir` suivent la convention de EuropeanArmyAnalyzer.create_army_analysis.
+    """
+    analyzer = EuropeanArmyAnalyzer("UE-27")
+    palette = analyzer.colors
+
+    if sketches is not None:
+        entities = list(entities or sketches)
+        print(f"🇪🇺 Comparaison de {len(entities)} entités (résumés en flux)...")
+        runs = _sketch_runs(sketches, entities, quantiles)
+    else:
+        entities = list(entities or ENTITES)
+        print(f"🇪🇺 Comparaison de {len(entities)} entités ({n_scenarios} scénarios chacune)...")
+        runs = _comparison_runs(entities, n_scenarios, volatilite, quantiles, seed)
+
+    if indicators is None:
+        indicators = []
+        for model, _, _, _ in runs.values():
+            indicators += [col for col in model.columns
+                           if col not in indicators and not col.startswith('Contribution_')]
+
+    colors = {name: palette[i % len(palette)] for i, name in enumerate(entities)}
+    styles = {name: STYLES_LIGNE[(i // len(palette)) % len(STYLES_LIGNE)]
+              for i, name in enumerate(entities)}
+
+    plt.style.use('seaborn-v0_8')
+    nrows = int(np.ceil(len(indicators) / ncols))
+    fig, axes = plt.subplots(nrows, ncols, figsize=(6 * ncols, 3.6 * nrows),
+                             sharex=True, squeeze=False)
+    panels = {}
+
+    for ax, indicator in zip(axes.flat, indicators):
+        names = [name for name in entities if indicator in runs[name][0].columns]
+        if not names:
+            ax.set_visible(False)
+            continue
+        years = runs[names[0]][0].years
+        k = [runs[name][0].columns.index(indicator) for name in names]
+        central = np.stack([runs[name][1][:, col] for name, col in zip(names, k)])
+        low = np.stack([runs[name][2][:, col] for name, col in zip(names, k)])
+        high = np.stack([runs[name][3][:, col] for name, col in zip(names, k)])
+
+        # (N, Y, 2) pour les lignes, (N, 2Y, 2) pour les bandes
+        x = np.broadcast_to(years, central.shape)
+        lines = np.stack([x, central], axis=-1)
+        bands = np.concatenate([np.stack([x, low], axis=-1),
+                                np.stack([x[:, ::-1], high[:, ::-1]], axis=-1)], axis=1)
+
+        line_colors = [colors[name] for name in names]
+        ax.add_collection(PolyCollection(bands, facecolors=line_colors,
+                                         edgecolors='none', alpha=0.12))
+        ax.add_collection(LineCollection(lines, colors=line_colors,
+                                         linestyles=[styles[name] for name in names],
+                                         linewidths=1.5, alpha=0.85))
+        ax.autoscale_view()
+        if indicator == 'Temps_Reaction':
+            ax.invert_yaxis()  # Moins de jours = mieux
+
+        ax.set_title(indicator.replace('_', ' '), fontsize=11, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        panels[indicator] = ax
+
+    for ax in list(axes.flat)[len(indicators):]:
+        ax.set_visible(False)
+        # Graduations sur le dernier panneau visible de la colonne
+        above = axes[:, list(axes[-1]).index(ax) if ax in axes[-1] else 0]
+        for other in above[::-1]:
+            if other.get_visible():
+                other.xaxis.set_tick_params(labelbottom=True)
+                break
+
+    # Légende commune : un artiste proxy par entité
+    handles = [Line2D([], [], color=colors[name], linestyle=styles[name], linewidth=2)
+               for name in entities]
+    fig.legend(handles, entities, loc='lower center', ncol=min(8, len(entities)),
+               fontsize=9, frameon=False)
+
+    plt.suptitle(f'Comparaison de l\'Intégration Militaire Européenne - {len(entities)} entités '
+                 f'({analyzer.start_year}-{analyzer.end_year}, bandes P{quantiles[0]}-P{quantiles[1]})',
+                 fontsize=16, fontweight='bold')
+    legend_rows = int(np.ceil(len(entities) / 8))
+    plt.tight_layout(rect=(0, 0.02 + 0.012 * legend_rows, 1, 0.98))
+
+    base_name = os.path.join(output_dir or '', 'comparaison_army_integration_analysis')
+    if render is None:
+        plt.savefig(f'{base_name}.png', dpi=300, bbox_inches='tight')
+        outputs = {"poster": f'{base_name}.png'}
+    else:
+        outputs = analyzer._save_render_outputs(fig, panels, base_name, render)
+
+    if show:
+        plt.show()
+
+    return outputs
@@ -0,0 +1,162 @@
+"""Contrefactuels : trajectoires avec et sans les effets PESCO, COVID et coopération
+
+Le panneau avant/après compare des moyennes de part et d'autre d'une année de
+référence ; il ne dit pas ce que l'intégration a apporté. Ce module évalue le
+scénario de référence de toutes les entités sous des ensembles d'effets
+désactivés :
+
+- 'pesco' : les courbes restent sur leur segment d'avant 2017 (tendance de base
+  sans inflexion PESCO) et le multiplicateur de lancement PESCO est retiré ;
+- 'cooperation_2020', 'covid', 'relance_2022' : le multiplicateur de
+  l'événement correspondant de _add_integration_trends est retiré.
+
+Toutes les séries (entité, indicateur) du registre sont empilées en un seul
+lot. Les deux jeux de courbes plafonnées (avec et sans PESCO) et les facteurs
+d'événements (E, N, Y) sont calculés une seule fois ; chaque variante n'est
+ensuite qu'un choix de courbes et un produit des facteurs conservés, obtenu
+pour toutes les variantes par un seul produit matriciel en log.
+"""
+import numpy as np
+import pandas as pd
+
+from Army import ENTITES, EuropeanArmyAnalyzer
+from army_scenarios import (ANNEE_REFERENCE, EVENEMENTS, compile_entity_model, evaluate_curves,
+                            event_activity)
+
+EFFETS = ['pesco'] + [name for name, _, _, _ in EVENEMENTS if name != 'pesco']
+
+
+def default_variants():
+    """Référence, retrait de chaque effet isolément et retrait de tous les effets"""
+    variants = {'reference': ()}
+    variants.update({f'sans_{effect}': (effect,) for effect in EFFETS})
+    variants['sans_integration'] = tuple(EFFETS)
+    return variants
+
+
+class CounterfactualResult:
+    """Valeurs (V, N, Y) des variantes pour toutes les séries, et tables dérivées"""
+
+    def __init__(self, variants, series, entity_types, years, values):
+        self.variants = dict(variants)
+        self.series = series
+        self.entity_types = entity_types
+        self.years = years
+        self.values = values
+
+    def frame(self, variant, entity):
+        """DataFrame au format de generate_army_data pour une variante et une entité"""
+        v = list(self.variants).index(variant)
+        rows = [i for i, (name, _) in enumerate(self.series) if name == entity]
+        frame = pd.DataFrame(self.values[v, rows].T, columns=[self.series[i][1] for i in rows])
+        frame.insert(0, 'Annee', self.years.astype(int))
+        return frame
+
+    def deltas(self, reference='reference'):
+        """Écarts référence - variante par entité, indicateur et variante (DataFrame long)
+
+        Un écart positif est la part de l'indicateur attribuable aux effets retirés.
+        """
+        r = list(self.variants).index(reference)
+        names = [name for name in self.variants if name != reference]
+        index = [list(self.variants).index(name) for name in names]
+        ref = self.values[r]
+        counter = self.values[index]                        # (V', N, Y)
+        delta = ref - counter
+        ref_mean = ref.mean(axis=1)
+        counter_mean = counter.mean(axis=2)
+        # Pourcentage indéfini (NaN) si la moyenne contrefactuelle est nulle
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta_pct = np.where(counter_mean != 0,
+                                 delta.mean(axis=2) / np.abs(counter_mean) * 100, np.nan)
+
+        n_variants, n_series = len(names), len(self.series)
+        return pd.DataFrame({
+            'Variante': np.repeat(names, n_series),
+            'Effets_Retires': np.repeat([', '.join(self.variants[name]) for name in names], n_series),
+            'Entite': np.tile([name for name, _ in self.series], n_variants),
+            'Indicateur': np.tile([column for _, column in self.series], n_variants),
+            'Moyenne_Reference': np.tile(ref_mean, n_variants),
+            'Moyenne_Contrefactuelle': counter_mean.ravel(),
+            'Delta_Moyen': delta.mean(axis=2).ravel(),
+            'Delta_Pct': delta_pct.ravel(),
+            'Delta_Final': delta[:, :, -1].ravel(),
+            'Delta_Cumule': delta.sum(axis=2).ravel(),
+        })
+
+    def savings(self, indicateur='Economies_Echelle', reference='reference'):
+        """Économies cumulées (Md€) attribuables aux effets, par entité et variante
+
+        Une ligne 'Total pays_ue' additionne les États membres.
+        """
+        table = self.deltas(reference)
+        table = table[table['Indicateur'] == indicateur]
+        pivot = table.pivot(index='Entite', columns='Variante', values='Delta_Cumule')
+        pivot = pivot.reindex(index=list(dict.fromkeys(name for name, _ in self.series)),
+                              columns=[name for name in self.variants if name != reference])
+        members = [name for name in pivot.index if self.entity_types[name] == 'pays_ue']
+        pivot.loc['Total pays_ue'] = pivot.loc[members].sum()
+        return pivot
+
+    def attribution(self, indicateur=None, reference='reference', statistique='Delta_Cumule'):
+        """Part de chaque effet retiré isolément, et interaction non additive
+
+        Interaction = écart du retrait de tous les effets - somme des écarts isolés
+        (non nulle à cause des plafonds et des multiplicateurs composés).
+        """
+        table = self.deltas(reference)
+        if indicateur is not None:
+            table = table[table['Indicateur'] == indicateur]
+        pivot = table.pivot_table(index=['Entite', 'Indicateur'], columns='Variante',
+                                  values=statistique, sort=False)
+        singles = [name for name, effects in self.variants.items() if len(effects) == 1]
+        result = pivot[singles].rename(columns={name: self.variants[name][0] for name in singles})
+        everything = [name for name, effects in self.variants.items() if set(effects) == set(EFFETS)]
+        if everything:
+            result['interaction'] = pivot[everything[0]] - result.sum(axis=1)
+        return result
+
+
+def run_counterfactuals(entities=None, variants=None):
+    """Évalue toutes les entités sous chaque variante en un seul lot vectorisé
+
+    `variants` : {nom: effets retirés} parmi EFFETS (default_variants() par défaut).
+    """
+    entities = list(entities or ENTITES)
+    variants = default_variants() if variants is None else dict(variants)
+    for name, effects in variants.items():
+        unknown = set(effects) - set(EFFETS)
+        if unknown:
+            raise ValueError(f"Effets inconnus dans {name}: {sorted(unknown)}")
+
+    models = [compile_entity_model(name) for name in entities]
+    years = models[0].years
+    series, entity_types = [], {}
+    curves, flat, lo, hi, factors = [], [], [], [], []
+    for name, model in zip(entities, models):
+        if not np.array_equal(model.years, years):
+            raise ValueError(f"Horizon de {name} différent de celui de {entities[0]}")
+        entity_types[name] = EuropeanArmyAnalyzer(name).config['type']
+        series += [(name, column) for column in model.columns]
+        curves.append(evaluate_curves(model, years).T)
+        # Sans PESCO : premier segment (avant 2017) prolongé sur tout l'horizon
+        x = years - ANNEE_REFERENCE
+        c = model.coefs[:, 0]
+        flat.append(c[:, :1] + c[:, 1:2] * x + c[:, 2:3] * x * x)
+        lo.append(model.lo)
+        hi.append(model.hi)
+        active = event_activity(model, years)
+        factors.append(np.where(active[:, None, :], model.event_mult[:, :, None], 1.0))
+
+    lo, hi = np.concatenate(lo)[:, None], np.concatenate(hi)[:, None]
+    # Courbes plafonnées (2, N, Y) : avec et sans PESCO
+    capped = np.clip(np.stack([np.concatenate(curves), np.concatenate(flat)]), lo, hi)
+    log_factors = np.log(np.concatenate(factors, axis=1))                   # (E, N, Y)
+
+    event_order = [name for name, _, _, _ in EVENEMENTS]
+    kept = np.array([[event not in effects for event in event_order]
+                     for effects in variants.values()], dtype=float)       # (V, E)
+    without_pesco = np.array(['pesco' in effects for effects in variants.values()], dtype=int)
+    multipliers = np.exp(np.tensordot(kept, log_factors, axes=1))           # (V, N, Y)
+    values = capped[without_pesco] * multipliers
+    return CounterfactualResult(variants, series, entity_types, years, values)
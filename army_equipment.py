@@ -0,0 +1,156 @@
+"""Graphe creux de partage d'équipements entre entités
+
+Le registre (`equipements_communs` des pays et de l'Union, `equipements_cles`
+des composantes) est compilé en une matrice d'incidence creuse entités x
+équipements A. Le graphe des plateformes partagées est S = A Aᵀ : S[i, j] est
+le nombre d'équipements communs à i et j, S[i, i] le nombre d'équipements de i.
+Toutes les analyses (recouvrement, groupes, centralité, paires partageant au
+moins k plateformes) restent creuses et passent donc à l'échelle d'un registre
+de milliers de variantes et de sous-systèmes.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+from Army import ENTITES, EuropeanArmyAnalyzer
+
+# Colonnes du modèle d'indicateurs influencées par le partage de plateformes
+COLONNES_INTEROPERABILITE = ['Interoperabilite', 'Equipements_Interoperables']
+
+
+def entity_equipment(config):
+    """Liste des équipements d'une configuration du registre"""
+    return config.get('equipements_communs', config.get('equipements_cles', []))
+
+
+class EquipmentGraph:
+    """Matrice d'incidence entités x équipements et graphe des plateformes partagées"""
+
+    def __init__(self, entities=None, registry=None):
+        if registry is None:
+            entities = list(entities or ENTITES)
+            registry = {name: EuropeanArmyAnalyzer(name).config for name in entities}
+        self.entities = list(registry)
+        self.entity_index = {name: i for i, name in enumerate(self.entities)}
+
+        self.equipment_index = {}
+        rows, cols = [], []
+        for i, name in enumerate(self.entities):
+            for equipment in entity_equipment(registry[name]):
+                j = self.equipment_index.setdefault(equipment, len(self.equipment_index))
+                rows.append(i)
+                cols.append(j)
+        self.equipment = list(self.equipment_index)
+
+        data = np.ones(len(rows), dtype=np.int32)
+        self.incidence = sparse.csr_matrix((data, (rows, cols)),
+                                           shape=(len(self.entities), len(self.equipment)))
+        self.incidence.sum_duplicates()
+        self.incidence.data[:] = 1
+        self.shared = (self.incidence @ self.incidence.T).tocsr()
+        self.degree = np.asarray(self.incidence.sum(axis=1)).ravel()
+        self._overlap = None
+
+    def _off_diagonal(self):
+        shared = self.shared.tocoo()
+        mask = shared.row != shared.col
+        return shared.row[mask], shared.col[mask], shared.data[mask]
+
+    def overlap_scores(self):
+        """Indice de Jaccard creux entre entités : communs / union des équipements"""
+        if self._overlap is None:
+            rows, cols, common = self._off_diagonal()
+            union = self.degree[rows] + self.degree[cols] - common
+            scores = common / np.maximum(union, 1)
+            self._overlap = sparse.csr_matrix((scores, (rows, cols)), shape=self.shared.shape)
+        return self._overlap
+
+    def pairs_sharing(self, k=1):
+        """Paires d'entités partageant au moins k plateformes (DataFrame trié)"""
+        upper = sparse.triu(self.shared, k=1).tocoo()
+        mask = upper.data >= k
+        rows, cols = upper.row[mask], upper.col[mask]
+        common = upper.data[mask]
+        table = pd.DataFrame({
+            'Entite_A': [self.entities[i] for i in rows],
+            'Entite_B': [self.entities[j] for j in cols],
+            'Plateformes_Communes': common,
+        })
+        return table.sort_values('Plateformes_Communes', ascending=False, ignore_index=True)
+
+    def shared_platforms(self, entity_a, entity_b):
+        """Noms des équipements communs à deux entités"""
+        a = self.incidence[self.entity_index[entity_a]].indices
+        b = self.incidence[self.entity_index[entity_b]].indices
+        return [self.equipment[j] for j in np.intersect1d(a, b)]
+
+    def clusters(self, k=1):
+        """Groupes d'entités connexes dans le graphe des paires partageant au moins k plateformes"""
+        rows, cols, common = self._off_diagonal()
+        mask = common >= k
+        adjacency = sparse.csr_matrix((np.ones(mask.sum()), (rows[mask], cols[mask])),
+                                      shape=self.shared.shape)
+        n_groups, labels = connected_components(adjacency, directed=False)
+        groups = [[] for _ in range(n_groups)]
+        for name, label in zip(self.entities, labels):
+            groups[label].append(name)
+        return sorted(groups, key=len, reverse=True)
+
+    def centrality(self, iterations=100, tolerance=1e-10):
+        """Centralités de degré pondéré et de vecteur propre (itération de puissance creuse)"""
+        rows, cols, common = self._off_diagonal()
+        adjacency = sparse.csr_matrix((common.astype(float), (rows, cols)), shape=self.shared.shape)
+        weighted_degree = np.asarray(adjacency.sum(axis=1)).ravel()
+
+        vector = np.ones(adjacency.shape[0]) / np.sqrt(adjacency.shape[0])
+        for _ in range(iterations):
+            # Décalage de l'identité : converge aussi pour les graphes bipartis
+            updated = adjacency @ vector + vector
+            norm = np.linalg.norm(updated)
+            if norm == 0:
+                break
+            updated /= norm
+            if np.abs(updated - vector).max() < tolerance:
+                vector = updated
+                break
+            vector = updated
+
+        return pd.DataFrame({
+            'Entite': self.entities,
+            'Equipements': self.degree,
+            'Degre_Pondere': weighted_degree,
+            'Centralite_Vecteur_Propre': vector / max(vector.max(), 1e-12),
+        }).sort_values('Centralite_Vecteur_Propre', ascending=False, ignore_index=True)
+
+    def interoperability_factor(self, entity, poids=0.1, partenaires=None):
+        """Facteur de croissance d'interopérabilité lié au partage de plateformes
+
+        1 + poids * (recouvrement de Jaccard moyen avec `partenaires`, par
+        défaut toutes les autres entités) ; 1 si l'entité est hors registre.
+        """
+        if entity not in self.entity_index:
+            return 1.0
+        i = self.entity_index[entity]
+        row = self.overlap_scores()[i]
+        if partenaires is None:
+            n_partners = len(self.entities) - 1
+            total = row.sum()
+        else:
+            columns = [self.entity_index[p] for p in partenaires if p in self.entity_index and p != entity]
+            n_partners = len(columns)
+            total = row[:, columns].sum() if columns else 0.0
+        return 1.0 + poids * total / max(n_partners, 1)
+
+
+def apply_interoperability_term(model, growth, graph, poids=0.1, partenaires=None):
+    """Multiplie les facteurs de croissance (S, K) des colonnes d'interopérabilité d'un modèle
+
+    `model` est un CompiledModel (army_scenarios) ; retourne une copie de `growth`.
+    """
+    factor = graph.interoperability_factor(model.entity, poids, partenaires)
+    growth = np.array(growth, dtype=float, copy=True)
+    for column in COLONNES_INTEROPERABILITE:
+        if column in model.columns:
+            growth[:, model.columns.index(column)] *= factor
+    return growth
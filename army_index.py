@@ -0,0 +1,162 @@
+"""Index inversés du registre : équipement, spécialisation, type et colonnes émises
+
+Chaque clé (équipement, spécialisation, type d'entité, colonne émise par
+generate_army_data) est associée à l'ensemble des entités correspondantes,
+stocké sous forme de bitset (entier Python, bit i = entité i du registre). Les
+requêtes booléennes se combinent avec & (et), | (ou), - (sauf) et ~ (non) et se
+réduisent à quelques opérations sur entiers :
+
+    index = RegistryIndex()
+    query = index.equipment('Eurofighter') & index.specialisation('cyberdefense')
+    query.entities()  # -> ['Allemagne', 'UE-27']
+
+Le résultat est une liste d'entités directement utilisable comme sélection de
+lot (create_comparison_analysis, run_chunked_sweep, build_graph...). Une clé
+absente de l'index (faute de frappe, équipement inconnu) lève KeyError.
+"""
+from Army import ENTITES, EuropeanArmyAnalyzer
+from army_equipment import entity_equipment
+
+# Colonnes émises par generate_army_data pour les pays et l'Union uniquement
+COLONNES_PAYS_UNION = ['Budget_Defense', 'Personnel']
+
+# Colonnes émises pour toutes les entités
+COLONNES_COMMUNES = [
+    'Projets_PESCO', 'Exercices_Communs', 'Interoperabilite',
+    'Capacite_Projection', 'Temps_Reaction', 'Equipements_Interoperables',
+    'Economies_Echelle', 'Reduction_Doublons', 'Efficacite_Operative',
+]
+
+# Colonnes optionnelles émises par generate_army_data selon les spécialisations
+COLONNES_SPECIALISATION = {
+    "cyberdefense": "Capacite_Cyber",
+    "renseignement": "Partage_Renseignement",
+    "force_nucleaire": "Dissuasion_Concertée",
+}
+
+
+class Query:
+    """Ensemble d'entités sous forme de bitset, combinable par opérateurs booléens"""
+
+    __slots__ = ('index', 'bits')
+
+    def __init__(self, index, bits):
+        self.index = index
+        self.bits = bits
+
+    def __and__(self, other):
+        return Query(self.index, self.bits & other.bits)
+
+    def __or__(self, other):
+        return Query(self.index, self.bits | other.bits)
+
+    def __sub__(self, other):
+        return Query(self.index, self.bits & ~other.bits)
+
+    def __invert__(self):
+        return Query(self.index, self.index.all_bits & ~self.bits)
+
+    def __len__(self):
+        return self.bits.bit_count() if hasattr(self.bits, 'bit_count') else bin(self.bits).count('1')
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __iter__(self):
+        return iter(self.entities())
+
+    def entities(self):
+        """Entités sélectionnées, dans l'ordre du registre"""
+        names, bits = self.index.entities, self.bits
+        selected = []
+        while bits:
+            low = bits & -bits
+            selected.append(names[low.bit_length() - 1])
+            bits ^= low
+        return selected
+
+    def __repr__(self):
+        return f"Query({self.entities()})"
+
+
+class RegistryIndex:
+    """Index inversés (clé -> bitset d'entités) construits une fois sur le registre"""
+
+    def __init__(self, entities=None, registry=None):
+        if registry is None:
+            entities = list(entities or ENTITES)
+            registry = {name: EuropeanArmyAnalyzer(name).config for name in entities}
+        self.entities = list(registry)
+        self.all_bits = (1 << len(self.entities)) - 1
+        self.by_equipment = {}
+        self.by_specialisation = {}
+        self.by_type = {}
+        self.by_column = {}
+        self.by_contributor = {}
+
+        for i, name in enumerate(self.entities):
+            config = registry[name]
+            bit = 1 << i
+            for equipment in entity_equipment(config):
+                self.by_equipment[equipment] = self.by_equipment.get(equipment, 0) | bit
+            for specialisation in config.get('specialisations', []):
+                self.by_specialisation[specialisation] = self.by_specialisation.get(specialisation, 0) | bit
+            self.by_type[config['type']] = self.by_type.get(config['type'], 0) | bit
+            for pays in config.get('pays_contributeurs', []):
+                self.by_contributor[pays] = self.by_contributor.get(pays, 0) | bit
+            for column in self._emitted_columns(config):
+                self.by_column[column] = self.by_column.get(column, 0) | bit
+
+    @staticmethod
+    def _emitted_columns(config):
+        """Colonnes de generate_army_data pour une configuration (mêmes règles de type)"""
+        columns = list(COLONNES_COMMUNES)
+        if config['type'] in ['pays_ue', 'union']:
+            columns += COLONNES_PAYS_UNION
+            columns += [COLONNES_SPECIALISATION[specialisation]
+                        for specialisation in config.get('specialisations', [])
+                        if specialisation in COLONNES_SPECIALISATION]
+        elif config['type'] == 'composante':
+            columns += [f'Contribution_{pays}' for pays in config.get('pays_contributeurs', [])]
+        return columns
+
+    def _query(self, table, keys, label):
+        bits = 0
+        for key in ([keys] if isinstance(keys, str) else keys):
+            try:
+                bits |= table[key]
+            except KeyError:
+                raise KeyError(f"Clé {label} inconnue : {key!r}") from None
+        return Query(self, bits)
+
+    def equipment(self, *names):
+        """Entités dotées d'au moins un des équipements"""
+        return self._query(self.by_equipment, names, 'équipement')
+
+    def specialisation(self, *names):
+        """Entités ayant au moins une des spécialisations"""
+        return self._query(self.by_specialisation, names, 'spécialisation')
+
+    def type(self, *names):
+        """Entités d'un des types ('pays_ue', 'union', 'composante')"""
+        return self._query(self.by_type, names, 'type')
+
+    def column(self, *names):
+        """Entités pour lesquelles generate_army_data émet une des colonnes"""
+        return self._query(self.by_column, names, 'colonne')
+
+    def contributor(self, *names):
+        """Composantes auxquelles contribue un des pays"""
+        return self._query(self.by_contributor, names, 'pays contributeur')
+
+    def all(self):
+        return Query(self, self.all_bits)
+
+    def select(self, equipment=None, specialisation=None, type=None, column=None):
+        """Sélection conjonctive : ET entre critères, OU entre valeurs d'un critère"""
+        query = self.all()
+        for method, values in ((self.equipment, equipment), (self.specialisation, specialisation),
+                               (self.type, type), (self.column, column)):
+            if values:
+                query &= method(*([values] if isinstance(values, str) else values))
+        return query.entities()
@@ -0,0 +1,234 @@
+"""Écritures disque en arrière-plan, en recouvrement avec le calcul
+
+Un AsyncWriter reçoit les sorties (DataFrame à sérialiser en CSV, figure à
+encoder, texte) dans une file bornée consommée par un pool de threads
+d'écriture : la génération de l'entité suivante se poursuit pendant
+l'encodage PNG et l'écriture des fichiers. La file bornée limite la mémoire
+retenue (un poster rastérisé à 300 dpi occupe environ 130 Mo) : si les
+écritures prennent du retard, `submit_*` bloque jusqu'à ce qu'une place se
+libère.
+
+Chaque fichier est écrit dans un fichier temporaire du même répertoire puis
+renommé (os.replace) : un fichier visible est toujours complet. Les erreurs
+sont collectées et remontées dans le résumé de close() ; la file est vidée à
+la sortie du bloc `with` et, à défaut, à la fin de l'interpréteur.
+
+    with AsyncWriter() as writer:
+        for entity in ENTITES:
+            ...
+            writer.submit_csv(df, f'{entity}_army_integration_data_2017_2027.csv')
+    print(writer.summary())
+"""
+import atexit
+import contextlib
+import io
+import os
+import queue
+import threading
+import time
+import uuid
+
+from Army import ENTITES, EuropeanArmyAnalyzer
+
+_FIN = object()  # Marqueur d'arrêt des threads d'écriture
+
+
+def atomic_write(path, write):
+    """Appelle write(chemin_temporaire) puis renomme le fichier vers `path`
+
+    Le fichier temporaire, unique par appel (exécutions concurrentes), est créé
+    dans le répertoire de `path` et garde son extension, pour les fonctions qui
+    en déduisent le format (savefig, np.savez). Utilisée par toutes les
+    écritures atomiques des modules army_*.
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    root, ext = os.path.splitext(name)
+    tmp_path = os.path.join(directory, f'.{root}.{uuid.uuid4().hex}.tmp{ext}')
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def _rasterize(fig, dpi, tight):
+    """Rendu Agg d'une figure en image PIL RGB, recadrée comme bbox_inches='tight'"""
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from PIL import Image
+
+    original_dpi = fig.dpi
+    fig.set_dpi(dpi)
+    try:
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        image = Image.fromarray(np.asarray(canvas.buffer_rgba())).convert('RGB')
+        if tight:
+            bbox = fig.get_tightbbox(canvas.get_renderer()).padded(0.1)
+            image = image.crop(EuropeanArmyAnalyzer._pixel_box(bbox.transformed(fig.dpi_scale_trans), image))
+    finally:
+        fig.set_dpi(original_dpi)
+    return image
+
+
+class AsyncWriter:
+    """File bornée de tâches d'écriture consommée par `workers` threads"""
+
+    def __init__(self, workers=2, max_pending=4):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self.written = []
+        self.errors = {}
+        self.write_time = 0.0  # Temps cumulé passé dans les écritures (tous threads)
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, name=f'army-writer-{i}', daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is _FIN:
+                    return
+                path, write = task
+                started = time.perf_counter()
+                try:
+                    atomic_write(path, write)
+                except Exception as exc:
+                    with self._lock:
+                        self.errors[path] = repr(exc)
+                else:
+                    with self._lock:
+                        self.written.append(path)
+                finally:
+                    with self._lock:
+                        self.write_time += time.perf_counter() - started
+            finally:
+                self._queue.task_done()
+
+    def submit(self, path, write):
+        """Programme write(chemin_temporaire) ; bloque si la file est pleine"""
+        if self._closed:
+            raise RuntimeError("AsyncWriter fermé")
+        self._queue.put((path, write))
+        return path
+
+    def submit_csv(self, df, path, **kwargs):
+        """Sérialise un DataFrame en CSV (index=False par défaut)"""
+        kwargs.setdefault('index', False)
+        return self.submit(path, lambda tmp_path: df.to_csv(tmp_path, **kwargs))
+
+    def submit_figure(self, fig, path, dpi=None, bbox_inches=None, compress_level=6, **kwargs):
+        """Programme l'enregistrement d'une figure matplotlib (arguments de savefig)
+
+        Le tracé reste dans le thread appelant : matplotlib ne permet pas de
+        tracer depuis plusieurs threads. Pour un PNG, la figure est rastérisée
+        (bbox_inches='tight' appliqué par recadrage du rendu, comme dans
+        _save_render_outputs) et seul l'encodage PNG, qui relâche le GIL, est
+        confié aux threads d'écriture. Les autres formats sont rendus en mémoire
+        par savefig et seuls leurs octets sont écrits en arrière-plan. La figure
+        est retirée de pyplot : elle ne doit plus être modifiée après l'appel.
+        """
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+        fmt = kwargs.pop('format', None) or os.path.splitext(path)[1][1:].lower()
+        if fmt != 'png' or kwargs:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches=bbox_inches, **kwargs)
+            return self.submit_bytes(buffer.getvalue(), path)
+
+        image = _rasterize(fig, dpi or fig.dpi, bbox_inches == 'tight')
+        return self.submit(path, lambda tmp_path: image.save(tmp_path, format='PNG',
+                                                             compress_level=compress_level))
+
+    def submit_bytes(self, data, path):
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+        return self.submit(path, write)
+
+    def submit_text(self, text, path):
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return self.submit(path, write)
+
+    def flush(self):
+        """Attend la fin de toutes les écritures programmées"""
+        self._queue.join()
+
+    def close(self):
+        """Vide la file, arrête les threads et retourne le résumé"""
+        if not self._closed:
+            self._closed = True
+            self.flush()
+            for _ in self._threads:
+                self._queue.put(_FIN)
+            for thread in self._threads:
+                thread.join()
+            atexit.unregister(self.close)
+        return self.summary()
+
+    def summary(self):
+        with self._lock:
+            return {'ecrits': list(self.written), 'echecs': dict(self.errors),
+                    'duree_ecriture_s': self.write_time}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_batch(entities=None, render=None, workers=2, max_pending=4, writer=None):
+    """Génère données, figure et insights de chaque entité, écritures en arrière-plan
+
+    Sans `writer`, un AsyncWriter est créé puis fermé en fin de lot. Retourne
+    {'entites', 'ecrits', 'echecs', 'duree_calcul_s', 'duree_ecriture_s', 'duree_s'} ;
+    'echecs' regroupe les erreurs de calcul (par entité) et d'écriture (par fichier).
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    entities = list(entities or ENTITES)
+    own_writer = writer is None
+    if own_writer:
+        writer = AsyncWriter(workers, max_pending)
+
+    started = time.perf_counter()
+    compute_time = 0.0
+    done, failures = [], {}
+    for entity in entities:
+        step = time.perf_counter()
+        try:
+            analyzer = EuropeanArmyAnalyzer(entity)
+            buffer = io.StringIO()
+            with contextlib.redirect_stdout(buffer):
+                df = analyzer.generate_army_data()
+                writer.submit_csv(df, f'{entity}_army_integration_data_2017_2027.csv')
+                buffer.seek(0)
+                buffer.truncate()
+                analyzer.create_army_analysis(df, render=render, show=False, writer=writer)
+            writer.submit_text(buffer.getvalue(), f'{entity}_army_integration_insights.txt')
+        except Exception as exc:
+            failures[entity] = repr(exc)
+            print(f"  ✗ {entity}: {exc!r}")
+        else:
+            done.append(entity)
+            print(f"  ✓ {entity}")
+        finally:
+            plt.close('all')
+            compute_time += time.perf_counter() - step
+
+    written = writer.close() if own_writer else (writer.flush() or writer.summary())
+    return {'entites': done, 'ecrits': written['ecrits'],
+            'echecs': {**failures, **written['echecs']},
+            'duree_calcul_s': compute_time, 'duree_ecriture_s': written['duree_ecriture_s'],
+            'duree_s': time.perf_counter() - started}
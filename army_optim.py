@@ -0,0 +1,160 @@
+"""Optimisation de la répartition d'un effort PESCO entre les États membres
+
+Question de planification : comment répartir un budget supplémentaire (Md€) ou
+un nombre de projets PESCO supplémentaires entre les membres pour maximiser un
+indicateur au niveau de l'Union (interopérabilité, capacité de projection...) ?
+
+Hypothèse de réponse : l'effort x_i d'un pays augmente son facteur de croissance
+(voir army_scenarios) avec des rendements décroissants,
+    g_i = 1 + elasticite * log(1 + x_i / reference_i),
+où reference_i est `budget_defense_base` ou `projets_pesco` du registre.
+L'objectif est la moyenne sur l'horizon de l'indicateur, pondérée par les
+effectifs (`personnel_base`), maximisée ou minimisée (temps de réaction, voir
+INDICATEURS_DECROISSANTS). Il est évalué pour les 27 membres d'un coup et
+son gradient est analytique ; la résolution (SLSQP) prend quelques millisecondes.
+"""
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+from Army import ENTITES, EuropeanArmyAnalyzer
+from army_scenarios import compile_entity_model, evaluate_curves, event_activity
+
+# Élasticité du facteur de croissance à l'effort relatif (hypothèses de modèle)
+ELASTICITES = {"budget": 0.5, "projets": 0.3}
+# Clé de registre servant de référence et de borne pour chaque levier
+REFERENCES = {"budget": "budget_defense_base", "projets": "projets_pesco"}
+# Indicateurs pour lesquels une valeur plus basse est meilleure (à minimiser)
+INDICATEURS_DECROISSANTS = ['Temps_Reaction']
+
+
+class AllocationProblem:
+    """Tables vectorisées (membres x années) d'un indicateur pour l'optimisation"""
+
+    def __init__(self, indicateur='Interoperabilite', levier='budget', entities=None, part_max=0.5):
+        if levier not in REFERENCES:
+            raise ValueError(f"Levier inconnu: {levier}")
+        if entities is None:
+            entities = [e for e in ENTITES if EuropeanArmyAnalyzer(e).config["type"] == "pays_ue"]
+        self.entities = list(entities)
+        self.indicateur = indicateur
+        self.levier = levier
+        self.elasticite = ELASTICITES[levier]
+        # +1 : plus haut est meilleur ; -1 : plus bas est meilleur
+        self.sens = -1 if indicateur in INDICATEURS_DECROISSANTS else 1
+
+        curves, base, lo, hi, mult, reference, weights = [], [], [], [], [], [], []
+        for name in self.entities:
+            analyzer = EuropeanArmyAnalyzer(name)
+            model = compile_entity_model(analyzer)
+            if indicateur not in model.columns:
+                raise ValueError(f"{name} n'a pas d'indicateur {indicateur}")
+            k = model.columns.index(indicateur)
+            years = model.years
+            curves.append(evaluate_curves(model, years)[:, k])
+            active = event_activity(model, years)
+            mult.append(np.prod(np.where(active, model.event_mult[:, k, None], 1.0), axis=0))
+            base.append(model.base[k])
+            lo.append(model.lo[k])
+            hi.append(model.hi[k])
+            reference.append(analyzer.config[REFERENCES[levier]])
+            weights.append(analyzer.config["personnel_base"])
+
+        self.curves = np.array(curves)            # (N, Y)
+        self.mult = np.array(mult)                # (N, Y)
+        self.base = np.array(base)[:, None]
+        self.lo = np.array(lo)[:, None]
+        self.hi = np.array(hi)[:, None]
+        self.reference = np.array(reference, dtype=float)
+        self.weights = np.array(weights, dtype=float) / np.sum(weights)
+        self.upper = part_max * self.reference  # Bornes par pays issues du registre
+
+    def growth(self, allocation):
+        return 1 + self.elasticite * np.log1p(allocation / self.reference)
+
+    def values(self, allocation):
+        """Indicateur (N, Y) pour une allocation donnée"""
+        g = self.growth(allocation)[:, None]
+        raw = self.base + g * (self.curves - self.base)
+        return np.clip(raw, self.lo, self.hi) * self.mult
+
+    def objective(self, allocation):
+        """Indicateur Union (moyenne pondérée sur membres et années) et son gradient"""
+        g = self.growth(allocation)[:, None]
+        raw = self.base + g * (self.curves - self.base)
+        value = np.clip(raw, self.lo, self.hi) * self.mult
+        union = self.weights @ value.mean(axis=1)
+        # d valeur / d g nul là où le plafond ou le plancher est atteint
+        slope = np.where((raw > self.lo) & (raw < self.hi), (self.curves - self.base) * self.mult, 0.0)
+        dg = self.elasticite / (self.reference + allocation)
+        gradient = self.weights * slope.mean(axis=1) * dg
+        return union, gradient
+
+
+def optimize_allocation(total, indicateur='Interoperabilite', levier='budget', entities=None,
+                        part_max=0.5, problem=None):
+    """Répartit `total` (Md€ ou projets) entre les membres pour améliorer l'indicateur Union
+
+    L'indicateur est maximisé, ou minimisé s'il figure dans INDICATEURS_DECROISSANTS.
+    Chaque pays reçoit entre 0 et `part_max` fois sa référence du registre.
+    Retourne (DataFrame par pays, dict récapitulatif) ; 'Gain' est positif quand
+    l'indicateur s'améliore.
+    """
+    if problem is None:
+        problem = AllocationProblem(indicateur, levier, entities, part_max)
+    if total > problem.upper.sum():
+        raise ValueError(f"Effort total {total} supérieur à la somme des bornes "
+                         f"({problem.upper.sum():.2f})")
+
+    def negative(allocation):
+        value, gradient = problem.objective(allocation)
+        return -problem.sens * value, -problem.sens * gradient
+
+    # Point de départ : répartition proportionnelle aux bornes
+    start = problem.upper * (total / problem.upper.sum())
+    result = minimize(negative, start, jac=True, method='SLSQP',
+                      bounds=list(zip(np.zeros_like(problem.upper), problem.upper)),
+                      constraints=[{"type": "eq", "fun": lambda a: a.sum() - total,
+                                    "jac": lambda a: np.ones_like(a)}])
+    allocation = np.clip(result.x, 0, problem.upper)
+
+    before = problem.values(np.zeros_like(allocation)).mean(axis=1)
+    after = problem.values(allocation).mean(axis=1)
+    table = pd.DataFrame({
+        'Entite': problem.entities,
+        'Reference': problem.reference,
+        'Borne_Max': problem.upper,
+        'Allocation': allocation,
+        f'{problem.indicateur}_Avant': before,
+        f'{problem.indicateur}_Apres': after,
+        'Gain': problem.sens * (after - before),
+    }).sort_values('Allocation', ascending=False, ignore_index=True)
+    if problem.levier == 'projets':
+        table.insert(4, 'Allocation_Entiere', _round_preserving_sum(table['Allocation'].to_numpy(), total,
+                                                                   table['Borne_Max'].to_numpy()))
+
+    summary = {
+        'indicateur': problem.indicateur,
+        'levier': problem.levier,
+        'sens': 'minimiser' if problem.sens < 0 else 'maximiser',
+        'total': total,
+        'union_avant': problem.objective(np.zeros_like(allocation))[0],
+        'union_apres': problem.objective(allocation)[0],
+        'succes': bool(result.success),
+        'message': result.message,
+        'iterations': result.nit,
+    }
+    return table, summary
+
+
+def _round_preserving_sum(values, total, upper):
+    """Arrondi aux entiers par plus forts restes, en conservant la somme et les bornes"""
+    floors = np.floor(values).astype(int)
+    remaining = int(round(total)) - floors.sum()
+    eligible = np.flatnonzero(floors + 1 <= upper + 1e-9)
+    if remaining > len(eligible):
+        raise ValueError(f"Impossible d'arrondir à un total de {int(round(total))} : "
+                         f"{remaining} unité(s) à répartir pour {len(eligible)} pays sous leur borne")
+    order = eligible[np.argsort(floors[eligible] - values[eligible])][:max(remaining, 0)]
+    floors[order] += 1
+    return floors
@@ -0,0 +1,130 @@
+"""Requêtes ponctuelles en forme close sur les indicateurs (sans DataFrame)
+
+Chaque série (entité, indicateur) du scénario de référence est une courbe
+polynomiale par morceaux, plafonnée, multipliée par des facteurs d'événements
+constants par morceaux (voir army_scenarios). Toutes les séries du registre
+sont compilées une fois sur une grille commune de points de rupture (union des
+noeuds des courbes et des bornes des événements) :
+
+- coefs (N, B + 1, 3) : coefficients c0 + c1 x + c2 x² par intervalle ;
+- mult (N, B + 1) : produit des multiplicateurs d'événements actifs ;
+- lo, hi (N,) : plancher et plafond.
+
+Une requête (entité, indicateur, date fractionnaire) se réduit à une recherche
+dichotomique dans les points de rupture et à quelques opérations flottantes :
+
+    table = IndicatorTable()
+    table.value('Pologne', 'Temps_Reaction', 2025.5)
+    table.values('Pologne', 'Temps_Reaction', np.linspace(2017, 2027, 10**6))
+
+Aux années entières, les valeurs sont celles de generate_army_data. Entre deux
+années, les événements sont actifs sur [début, fin) : la baisse COVID couvre
+ainsi 2020 <= t < 2022. Hors de l'horizon, le dernier segment est prolongé.
+"""
+import bisect
+from functools import lru_cache
+
+import numpy as np
+
+from Army import ENTITES
+from army_scenarios import ANNEE_REFERENCE, compile_entity_model, event_activity
+
+
+class IndicatorTable:
+    """Tables de points de rupture et de coefficients de toutes les séries du registre"""
+
+    def __init__(self, entities=None):
+        self.entities = list(entities or ENTITES)
+        models = [compile_entity_model(name) for name in self.entities]
+
+        self.series = [(model.entity, column) for model in models for column in model.columns]
+        self.series_index = {key: i for i, key in enumerate(self.series)}
+        self.indicators = sorted({column for _, column in self.series})
+
+        # Grille commune : noeuds finis des courbes et bornes des événements
+        points = set()
+        for model in models:
+            points.update(model.knots[np.isfinite(model.knots)].tolist())
+            points.update(model.event_start[np.isfinite(model.event_start)].tolist())
+            points.update(model.event_end[np.isfinite(model.event_end)].tolist())
+        self.breakpoints = np.array(sorted(points))
+        # Un point représentatif par intervalle [B[j-1], B[j])
+        representatives = np.concatenate([[self.breakpoints[0] - 1], self.breakpoints])
+
+        n_series, n_intervals = len(self.series), len(representatives)
+        self.coefs = np.empty((n_series, n_intervals, 3))
+        self.mult = np.empty((n_series, n_intervals))
+        self.lo = np.empty(n_series)
+        self.hi = np.empty(n_series)
+        row = 0
+        for model in models:
+            active = event_activity(model, representatives)
+            for k in range(len(model.columns)):
+                segment = np.searchsorted(model.knots[k], representatives, side='right')
+                self.coefs[row] = model.coefs[k, segment]
+                self.mult[row] = np.prod(np.where(active, model.event_mult[:, k, None], 1.0), axis=0)
+                self.lo[row] = model.lo[k]
+                self.hi[row] = model.hi[k]
+                row += 1
+
+        # Copie en listes Python pour le chemin scalaire (pas de surcoût NumPy)
+        self._breakpoints = self.breakpoints.tolist()
+        self._scalar = [[(c[0], c[1], c[2], m) for c, m in zip(coefs.tolist(), mult.tolist())]
+                        for coefs, mult in zip(self.coefs, self.mult)]
+        self._bounds = list(zip(self.lo.tolist(), self.hi.tolist()))
+
+    def series_id(self, entity, indicator):
+        """Identifiant de la série (entité, indicateur) ; KeyError si elle n'existe pas"""
+        try:
+            return self.series_index[(entity, indicator)]
+        except KeyError:
+            raise KeyError(f"Pas d'indicateur {indicator} pour {entity}") from None
+
+    def series_ids(self, entities, indicators):
+        """Identifiants vectorisés ; `entities` et `indicators` sont diffusés l'un sur l'autre"""
+        entities, indicators = np.broadcast_arrays(np.asarray(entities), np.asarray(indicators))
+        names, entity_inverse = np.unique(entities, return_inverse=True)
+        columns, indicator_inverse = np.unique(indicators, return_inverse=True)
+        # Sous-table (entités distinctes x indicateurs distincts) : peu d'appels Python
+        lookup = np.array([[self.series_index.get((name, column), -1) for column in columns.tolist()]
+                           for name in names.tolist()], dtype=np.intp).reshape(len(names), len(columns))
+        ids = lookup[entity_inverse.ravel(), indicator_inverse.ravel()].reshape(entities.shape)
+        if (ids < 0).any():
+            missing = np.argwhere(ids.ravel() < 0)[0, 0]
+            self.series_id(entities.ravel()[missing], indicators.ravel()[missing])
+        return ids
+
+    def value(self, entity, indicator, t):
+        """Valeur d'un indicateur à une date (année fractionnaire), chemin scalaire"""
+        sid = self.series_id(entity, indicator)
+        c0, c1, c2, m = self._scalar[sid][bisect.bisect_right(self._breakpoints, t)]
+        x = t - ANNEE_REFERENCE
+        lo, hi = self._bounds[sid]
+        return min(max(c0 + c1 * x + c2 * x * x, lo), hi) * m
+
+    def evaluate(self, ids, times):
+        """Chemin vectorisé sur des identifiants de séries (voir series_ids), diffusés avec `times`"""
+        ids, times = np.broadcast_arrays(np.asarray(ids), np.asarray(times, dtype=float))
+        segment = np.searchsorted(self.breakpoints, times, side='right')
+        c = self.coefs[ids, segment]
+        x = times - ANNEE_REFERENCE
+        raw = c[..., 0] + c[..., 1] * x + c[..., 2] * x * x
+        return np.minimum(np.maximum(raw, self.lo[ids]), self.hi[ids]) * self.mult[ids, segment]
+
+    def values(self, entities, indicators, times):
+        """Valeurs pour des tableaux (diffusables) d'entités, d'indicateurs et de dates"""
+        return self.evaluate(self.series_ids(entities, indicators), times)
+
+
+@lru_cache(maxsize=None)
+def default_table():
+    """Table du registre complet, compilée au premier appel"""
+    return IndicatorTable()
+
+
+def query_indicator(entity, indicator, t):
+    """Valeur d'un indicateur à une date, scalaire ou vectorisée sur `t`"""
+    table = default_table()
+    if np.ndim(t) == 0:
+        return table.value(entity, indicator, float(t))
+    return table.evaluate(table.series_id(entity, indicator), t)
@@ -0,0 +1,373 @@
+"""Rapport HTML statique regroupant plusieurs entités
+
+Le rapport contient, pour chaque entité, la figure d'analyse (PNG intermédiaire et
+vignette), le tableau des indicateurs clés et les insights structurés
+(collect_army_insights), puis une comparaison croisée des entités (tableau et
+figure en petits multiples d'army_comparison) et les paramètres de l'exécution.
+
+Les sections des entités et la figure de comparaison sont rendues en parallèle
+dans un pool de processus : la durée totale est celle de la tâche la plus
+longue, non la somme. Chaque tâche écrit ses figures directement dans le
+répertoire `figures/` du rapport, jamais dans le répertoire courant. Les
+ressources partagées (feuille de style, palette, légende des événements) sont
+écrites une seule fois dans `assets/`. Chaque section est mise en cache (`cache/`) avec l'empreinte de ses entrées
+(configuration, paramètres, options de rendu, version du code de l'analyse,
+voir army_build, et source de ce module) et n'est recalculée que si cette
+empreinte change.
+
+Usage :
+    python3 army_report.py                          # toutes les entités
+    python3 army_report.py France Allemagne -j 4 -o rapport
+"""
+import argparse
+import contextlib
+import html
+import inspect
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import quote
+
+from Army import ENTITES, RENDER_DEFAULTS, EuropeanArmyAnalyzer
+from army_build import CODE_DONNEES, CODE_FIGURE, CODE_INSIGHTS, code_version, digest, save_state
+from army_io import atomic_write
+from army_scenarios import EVENEMENTS
+
+DOSSIER_RAPPORT = 'army_report'
+# Sorties raster seules : le rapport n'affiche que le PNG intermédiaire et la vignette
+RENDU_RAPPORT = {"vector_formats": (), "tiles": False}
+
+# Indicateurs du tableau par entité et de la comparaison croisée
+INDICATEURS_CLES = ['Interoperabilite', 'Capacite_Projection', 'Temps_Reaction',
+                    'Efficacite_Operative', 'Economies_Echelle', 'Projets_PESCO']
+COLONNES_COMPARAISON = [
+    ('Interoperabilite', 'dernier', 'Interopérabilité {fin}'),
+    ('Interoperabilite', 'croissance_pct', 'Croissance interop. (%)'),
+    ('Capacite_Projection', 'dernier', 'Projection {fin}'),
+    ('Temps_Reaction', 'moyenne', 'Temps de réaction moyen (j)'),
+    ('Economies_Echelle', 'somme', 'Économies cumulées (Md€)'),
+    ('Projets_PESCO', 'dernier', 'Projets PESCO {fin}'),
+]
+
+CSS = """:root {{ {palette} }}
+body {{ font-family: "DejaVu Sans", Arial, sans-serif; margin: 2em auto; max-width: 1200px; color: #222; }}
+h1 {{ color: var(--couleur-0); border-bottom: 3px solid var(--couleur-2); padding-bottom: .3em; }}
+h2 {{ color: var(--couleur-0); margin-top: 2em; }}
+nav {{ display: flex; flex-wrap: wrap; gap: .8em; }}
+nav a {{ text-align: center; font-size: .85em; color: #222; text-decoration: none; }}
+nav img {{ display: block; width: 120px; border: 1px solid #ccc; }}
+table {{ border-collapse: collapse; margin: 1em 0; font-size: .9em; }}
+th, td {{ border: 1px solid #ccc; padding: .3em .6em; text-align: right; }}
+th:first-child, td:first-child {{ text-align: left; }}
+thead th {{ background: var(--couleur-0); color: #fff; }}
+img.figure {{ max-width: 100%; }}
+.insights {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(320px, 1fr)); gap: 0 2em; }}
+.echec {{ color: var(--couleur-1); }}
+"""
+
+
+def _slug(entity):
+    return entity.replace(' ', '_')
+
+
+def _write_if_changed(path, content):
+    """Écrit `content` (texte) de façon atomique, seulement s'il a changé"""
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    atomic_write(path, write)
+    return True
+
+
+def _legend_svg(palette):
+    """Légende des événements du modèle (army_scenarios.EVENEMENTS)"""
+    rows = []
+    for i, (name, start, end, _) in enumerate(EVENEMENTS):
+        period = f"{start}-{end - 1}" if end is not None else f"depuis {start}"
+        y = 20 + 22 * i
+        rows.append(f'<rect x="5" y="{y - 12}" width="14" height="14" fill="{palette[i % len(palette)]}"/>'
+                    f'<text x="26" y="{y}" font-size="13">{html.escape(name)} ({period})</text>')
+    height = 20 + 22 * len(EVENEMENTS)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="320" height="{height}">'
+            + ''.join(rows) + '</svg>\n')
+
+
+def write_assets(output_dir, palette):
+    """Ressources partagées du rapport, écrites une fois et réécrites seulement si modifiées"""
+    assets = os.path.join(output_dir, 'assets')
+    os.makedirs(assets, exist_ok=True)
+    variables = ' '.join(f'--couleur-{i}: {color};' for i, color in enumerate(palette))
+    _write_if_changed(os.path.join(assets, 'army_report.css'), CSS.format(palette=variables))
+    _write_if_changed(os.path.join(assets, 'palette.json'), json.dumps(palette, indent=1) + '\n')
+    _write_if_changed(os.path.join(assets, 'legende_evenements.svg'), _legend_svg(palette))
+    return ['assets/army_report.css', 'assets/palette.json', 'assets/legende_evenements.svg']
+
+
+def _figure_paths(outputs, output_dir):
+    """Chemins des fichiers produits, relatifs au rapport ; les tuiles sont mises à plat"""
+    paths = {}
+    for key, value in outputs.items():
+        if isinstance(value, dict):
+            paths.update({f'{key}_{name}': path for name, path in value.items()})
+        else:
+            paths[key] = value
+    return {key: os.path.relpath(path, output_dir).replace(os.sep, '/') for key, path in paths.items()}
+
+
+def _table(header, rows):
+    head = ''.join(f'<th>{html.escape(str(cell))}</th>' for cell in header)
+    body = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(cell))}</td>' for cell in row) + '</tr>'
+                   for row in rows)
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+def _format(value, decimals=1):
+    return '—' if value != value else f'{value:,.{decimals}f}'.replace(',', ' ')
+
+
+def _section_html(analyzer, figures, summary, insights, reference_year):
+    """Fragment HTML de la section d'une entité"""
+    name = analyzer.country_component
+    rows = []
+    for indicator in INDICATEURS_CLES:
+        if indicator in summary.index:
+            line = summary.loc[indicator]
+            rows.append([indicator, _format(line['premier'], 2), _format(line['dernier'], 2),
+                         _format(line['croissance_pct']), _format(line['cagr_pct']),
+                         _format(line['delta_pct'])])
+    header = ['Indicateur', str(analyzer.start_year), str(analyzer.end_year), 'Croissance (%)',
+              'TCAM (%)', f'Après/avant {reference_year} (%)']
+
+    blocks = []
+    for section in insights:
+        if section['type'] == 'mesures':
+            content = _table(['Mesure', 'Valeur'], section['lignes'])
+        else:
+            content = '<ul>' + ''.join(f'<li>{html.escape(line)}</li>' for line in section['lignes']) + '</ul>'
+        blocks.append(f'<div><h3>{html.escape(section["titre"])}</h3>{content}</div>')
+
+    return (f'<section id="{quote(_slug(name))}"><h2>{html.escape(name)}</h2>'
+            f'<a href="{quote(figures["medium"])}"><img class="figure" src="{quote(figures["medium"])}" '
+            f'alt="Analyse {html.escape(name)}"></a>'
+            f'<h3>Indicateurs clés</h3>{_table(header, rows)}'
+            f'<div class="insights">{"".join(blocks)}</div></section>')
+
+
+def _render_section(entity, render, output_dir):
+    """Tâche du pool : données, figure et fragment HTML d'une entité"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    analyzer = EuropeanArmyAnalyzer(entity)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = analyzer.generate_army_data()
+        outputs = analyzer.create_army_analysis(df, render=render, show=False,
+                                                output_dir=os.path.join(output_dir, 'figures'))
+    plt.close('all')
+    figures = _figure_paths(outputs, output_dir)
+
+    metrics = analyzer.compute_derived_metrics(df)
+    summary = metrics['summary']
+    insights = analyzer.collect_army_insights(df, metrics)
+    comparison = {f'{indicator}:{stat}': float(summary.loc[indicator, stat])
+                  for indicator, stat, _ in COLONNES_COMPARAISON if indicator in summary.index}
+    return {"html": _section_html(analyzer, figures, summary, insights, metrics['reference_year']),
+            "figures": figures, "type": analyzer.config['type'], "comparaison": comparison}
+
+
+def _render_comparison(entities, n_scenarios, seed, render, output_dir):
+    """Tâche du pool : figure de comparaison en petits multiples"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    from army_comparison import create_comparison_analysis
+    with contextlib.redirect_stdout(io.StringIO()):
+        outputs = create_comparison_analysis(entities, n_scenarios=n_scenarios, seed=seed,
+                                             render=render, show=False,
+                                             output_dir=os.path.join(output_dir, 'figures'))
+    plt.close('all')
+    return {"figures": _figure_paths(outputs, output_dir)}
+
+
+def _load_cached(path, signature, output_dir):
+    """Section en cache si l'empreinte correspond et que ses figures existent"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        cached = json.load(f)
+    if cached.get("signature") != signature:
+        return None
+    if not all(os.path.exists(os.path.join(output_dir, p)) for p in cached["result"]["figures"].values()):
+        return None
+    return cached["result"]
+
+
+def _comparison_html(entities, results, comparison, end_year):
+    header = ['Entité', 'Type'] + [label.format(fin=end_year) for _, _, label in COLONNES_COMPARAISON]
+    rows = []
+    for name in entities:
+        result = results.get(name)
+        if result is None:
+            continue
+        values = result["comparaison"]
+        rows.append([name, result["type"]] + [
+            _format(values[f'{indicator}:{stat}'], 2) if f'{indicator}:{stat}' in values else '—'
+            for indicator, stat, _ in COLONNES_COMPARAISON])
+    figure = ''
+    if comparison is not None:
+        path = quote(comparison["figures"]["medium"])
+        figure = f'<a href="{path}"><img class="figure" src="{path}" alt="Comparaison des entités"></a>'
+    return (f'<section id="comparaison"><h2>Comparaison des entités</h2>{_table(header, rows)}'
+            f'{figure}</section>')
+
+
+def _parameters_html(parameters):
+    rows = [[key, value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)]
+            for key, value in parameters.items()]
+    return (f'<section id="parametres"><h2>Paramètres de l\'exécution</h2>{_table(["Paramètre", "Valeur"], rows)}'
+            f'<img src="assets/legende_evenements.svg" alt="Événements du modèle"></section>')
+
+
+def build_report(entities=None, output_dir=DOSSIER_RAPPORT, jobs=None, render=None,
+                 comparison=True, n_scenarios=200, seed=0, force=False):
+    """Construit le rapport HTML des entités demandées (toutes par défaut)
+
+    Retourne un résumé {'rapport': chemin, 'construites': [...], 'cache': [...],
+    'echecs': {nom: erreur}, 'duree_s': durée}.
+    """
+    started = time.perf_counter()
+    entities = list(entities or ENTITES)
+    render_options = {**RENDER_DEFAULTS, **RENDU_RAPPORT, **(render or {})}
+    cache_dir = os.path.join(output_dir, 'cache')
+    os.makedirs(os.path.join(output_dir, 'figures'), exist_ok=True)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    reference = EuropeanArmyAnalyzer(entities[0])
+    events = digest(EVENEMENTS)
+    # Module entier : _render_section, _section_html, _table, _format, _figure_paths...
+    code_report = inspect.getsource(sys.modules[__name__])
+    code_section = digest([code_version(*CODE_DONNEES, *CODE_FIGURE, *CODE_INSIGHTS), code_report])
+
+    # Tâches : (nom, fichier de cache, empreinte, fonction, arguments)
+    tasks = []
+    for entity in entities:
+        analyzer = EuropeanArmyAnalyzer(entity)
+        params = {"start_year": analyzer.start_year, "end_year": analyzer.end_year,
+                  "reference_year": analyzer.reference_year}
+        signature = digest({"config": analyzer.config, "params": params, "events": events,
+                             "render": render_options, "code": code_section})
+        tasks.append((entity, os.path.join(cache_dir, f'{_slug(entity)}.json'), signature,
+                      _render_section, (entity, render_options, os.path.abspath(output_dir))))
+    if comparison:
+        import army_comparison
+        import army_scenarios
+        signature = digest({"configs": {e: EuropeanArmyAnalyzer(e).config for e in entities},
+                             "n_scenarios": n_scenarios, "seed": seed, "render": render_options,
+                             "code": [inspect.getsource(army_comparison), inspect.getsource(army_scenarios),
+                                      code_version('_save_render_outputs', '_pixel_box'), code_report]})
+        tasks.insert(0, ('comparaison', os.path.join(cache_dir, 'comparaison.json'), signature,
+                         _render_comparison, (entities, n_scenarios, seed, render_options,
+                                              os.path.abspath(output_dir))))
+
+    print(f"🇪🇺 Rapport HTML de {len(entities)} entités...")
+    results, summary = {}, {'construites': [], 'cache': [], 'echecs': {}}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        for name, cache_path, signature, action, args in tasks:
+            cached = None if force else _load_cached(cache_path, signature, output_dir)
+            if cached is not None:
+                results[name] = cached
+                summary['cache'].append(name)
+            else:
+                running[pool.submit(action, *args)] = (name, cache_path, signature)
+
+        # Ressources partagées écrites pendant le rendu des sections
+        assets = write_assets(output_dir, reference.colors)
+
+        for future in as_completed(running):
+            name, cache_path, signature = running[future]
+            try:
+                results[name] = future.result()
+            except Exception as exc:
+                summary['echecs'][name] = repr(exc)
+                print(f"  ✗ {name}: {exc!r}")
+                continue
+            save_state({"signature": signature, "result": results[name]}, cache_path)
+            summary['construites'].append(name)
+            print(f"  ✓ {name}")
+
+    sections = []
+    for name in entities:
+        if name in results:
+            sections.append(results[name]["html"])
+        else:
+            sections.append(f'<section id="{quote(_slug(name))}"><h2>{html.escape(name)}</h2>'
+                            f'<p class="echec">Échec : {html.escape(summary["echecs"].get(name, ""))}</p>'
+                            f'</section>')
+    navigation = ''.join(
+        f'<a href="#{quote(_slug(name))}"><img src="{quote(results[name]["figures"]["thumbnail"])}" '
+        f'alt="">{html.escape(name)}</a>' if name in results
+        else f'<a href="#{quote(_slug(name))}">{html.escape(name)}</a>'
+        for name in entities)
+
+    parameters = {
+        "Date": datetime.now().strftime('%Y-%m-%d %H:%M'),
+        "Entités": str(len(entities)),
+        "Période": f"{reference.start_year}-{reference.end_year}",
+        "Année de référence avant/après": str(reference.reference_year),
+        "Scénarios (comparaison)": str(n_scenarios) if comparison else "—",
+        "Graine": str(seed),
+        "Rendu": {key: render_options[key] for key in ('medium_dpi', 'thumbnail_size', 'thumbnail_colors')},
+        "Sections recalculées": str(len(summary['construites'])),
+        "Sections en cache": str(len(summary['cache'])),
+    }
+    document = (
+        '<!DOCTYPE html>\n<html lang="fr"><head><meta charset="utf-8">'
+        '<title>Intégration militaire européenne</title>'
+        f'<link rel="stylesheet" href="{assets[0]}"></head><body>'
+        f'<h1>Analyse de l\'Intégration Militaire Européenne ({reference.start_year}-{reference.end_year})</h1>'
+        f'<nav>{navigation}</nav>'
+        + ''.join(sections)
+        + (_comparison_html(entities, results, results.get('comparaison'), reference.end_year)
+           if comparison else '')
+        + _parameters_html(parameters)
+        + '</body></html>\n')
+    report_path = os.path.join(output_dir, 'index.html')
+    _write_if_changed(report_path, document)
+
+    summary['rapport'] = report_path
+    summary['duree_s'] = time.perf_counter() - started
+    return summary
+
+
+def main():
+    """Construit le rapport HTML des entités demandées (toutes par défaut)"""
+    parser = argparse.ArgumentParser(description="Rapport HTML de l'intégration militaire européenne")
+    parser.add_argument('entites', nargs='*', help="Entités du rapport (toutes par défaut)")
+    parser.add_argument('-o', '--output', default=DOSSIER_RAPPORT, help="Répertoire du rapport")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Processus parallèles")
+    parser.add_argument('--scenarios', type=int, default=200, help="Scénarios de la comparaison")
+    parser.add_argument('--sans-comparaison', action='store_true', help="Omettre la figure de comparaison")
+    parser.add_argument('--force', action='store_true', help="Ignorer le cache des sections")
+    args = parser.parse_args()
+
+    summary = build_report(args.entites or None, args.output, args.jobs,
+                           comparison=not args.sans_comparaison, n_scenarios=args.scenarios,
+                           force=args.force)
+    print(f"\n✅ Rapport: {summary['rapport']} ({summary['duree_s']:.1f} s) - "
+          f"{len(summary['construites'])} section(s) recalculée(s), {len(summary['cache'])} en cache, "
+          f"{len(summary['echecs'])} échec(s)")
+
+
+if __name__ == "__main__":
+    main()
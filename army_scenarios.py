@@ -0,0 +1,320 @@
+"""Moteur de scénarios vectorisé pour les indicateurs d'intégration militaire
+
+Chaque indicateur de `EuropeanArmyAnalyzer._simulate_*` est une fonction
+polynomiale par morceaux de l'année (linéaire, ou quadratique pour le budget et
+les effectifs), éventuellement plafonnée, puis ajustée par les multiplicateurs
+d'événements de `_add_integration_trends`. Ce module compile ces courbes en
+tables (noeuds, coefficients, plafonds, matrice d'événements) et les évalue
+pour de nombreux scénarios d'un coup.
+
+Un scénario est défini par :
+- un facteur de croissance g par indicateur, appliqué à l'écart au niveau
+  d'avant PESCO : valeur = base + g * (courbe - base), avant plafonnement ;
+- une intensité e par événement : le multiplicateur m devient 1 + e * (m - 1).
+
+Avec g = e = 1, le résultat est identique à `generate_army_data`.
+
+Si Numba est installé, `run_scenarios` utilise un noyau compilé (parallèle sur
+les scénarios, mis en cache sur disque) qui fusionne toutes les étapes en une
+seule passe ; sinon il se replie sur l'implémentation NumPy de référence.
+"""
+import numpy as np
+
+from Army import EuropeanArmyAnalyzer
+
+try:
+    from numba import njit, prange
+    NUMBA_DISPONIBLE = True
+except ImportError:
+    NUMBA_DISPONIBLE = False
+    prange = range
+
+ANNEE_REFERENCE = 2016  # Origine des polynômes : x = année - 2016
+
+# Événements de _add_integration_trends : (nom, début inclus, fin exclue, multiplicateurs)
+EVENEMENTS = [
+    ("pesco", 2017, None, {"Interoperabilite": 1.05, "Exercices_Communs": 1.10}),
+    ("cooperation_2020", 2020, None, {"Capacite_Projection": 1.08,
+                                      "Efficacite_Operative": 1.06,
+                                      "Economies_Echelle": 1.12}),
+    ("covid", 2020, 2022, {"Budget_Defense": 0.95, "Exercices_Communs": 0.80}),
+    ("relance_2022", 2022, None, {"Projets_PESCO": 1.15, "Interoperabilite": 1.07}),
+]
+
+
+def _lin(level, slope, anchor):
+    """Coefficients (c0, c1, c2) en x de level + slope * (année - anchor)"""
+    return (level - slope * (anchor - ANNEE_REFERENCE), slope, 0.0)
+
+
+def _courbe_standard(base, pentes, niveaux, facteur=1.0, plafond=None, plancher=None):
+    """Courbe à quatre phases (avant 2017, 2017-2019, 2020-2022, 2023+)"""
+    segments = [(base, 0.0, 0.0),
+                _lin(niveaux[0], pentes[0], 2016),
+                _lin(niveaux[1], pentes[1], 2019),
+                _lin(niveaux[2], pentes[2], 2022)]
+    coefs = [tuple(facteur * c for c in seg) for seg in segments]
+    return {"knots": [2017, 2020, 2023], "coefs": coefs, "base": facteur * base,
+            "lo": plancher, "hi": plafond}
+
+
+def _curve_specs(analyzer):
+    """Décrit chaque colonne de generate_army_data sous forme de courbe compilée"""
+    config = analyzer.config
+    entity_type = config["type"]
+    s = analyzer.start_year - ANNEE_REFERENCE  # i = x - s dans les _simulate_*
+    specs = {}
+
+    if entity_type in ["pays_ue", "union"]:
+        b = config["budget_defense_base"]
+        if entity_type == "pays_ue":
+            g0 = 0.03
+        elif entity_type == "union":
+            g0 = 0.05
+        else:
+            g0 = 0.025
+        specs['Budget_Defense'] = {
+            "knots": [2017, 2022],
+            "coefs": [(b * (1 - g0 * s), b * g0, 0.0),
+                      (b * (1 - g0 * s), b * (g0 - 0.01 * s), b * 0.01),
+                      (b * (1 - (g0 + 0.06) * s), b * (g0 + 0.06), 0.0)],
+            "base": b, "lo": None, "hi": None}
+        p = config["personnel_base"]
+        specs['Personnel'] = {
+            "knots": [2017, 2021],
+            "coefs": [(p * (1 + 0.01 * s), -0.01 * p, 0.0),
+                      (p * (1 + 0.01 * s), p * (-0.01 - 0.005 * s), 0.005 * p),
+                      (p * (1 - 0.015 * s), 0.015 * p, 0.0)],
+            "base": p, "lo": None, "hi": None}
+
+    pesco = config.get("projets_pesco", 5)
+    specs['Projets_PESCO'] = _courbe_standard(0, [pesco / 3, 2, 3], [0, pesco, pesco + 6])
+
+    if entity_type in ["pays_ue", "union"]:
+        multiplier = 1.0
+    elif entity_type == "composante":
+        multiplier = 0.5
+    else:
+        multiplier = 0.3
+    specs['Exercices_Communs'] = _courbe_standard(10, [2, 3, 4], [10, 16, 25], facteur=multiplier)
+    specs['Interoperabilite'] = _courbe_standard(45, [10, 8, 1], [45, 75, 99], plafond=100)
+    specs['Capacite_Projection'] = _courbe_standard(30, [8, 6, 4], [30, 54, 72], plafond=100)
+    specs['Temps_Reaction'] = _courbe_standard(30, [-3, -2, -1], [30, 21, 15], plancher=5)
+    specs['Equipements_Interoperables'] = _courbe_standard(25, [12, 10, 8], [25, 61, 91], plafond=100)
+
+    if entity_type in ["pays_ue", "union"]:
+        multiplier = 1.0
+    elif entity_type == "composante":
+        multiplier = 0.7
+    else:
+        multiplier = 0.5
+    specs['Economies_Echelle'] = _courbe_standard(0, [0.5, 0.4, 0.6], [0, 1.5, 2.7], facteur=multiplier)
+    specs['Reduction_Doublons'] = _courbe_standard(0, [5, 4, 3], [0, 15, 27], plafond=50)
+    specs['Efficacite_Operative'] = _courbe_standard(60, [5, 4, 3], [60, 75, 87], plafond=95)
+
+    if entity_type in ["pays_ue", "union"]:
+        for specialisation in config.get("specialisations", []):
+            if specialisation == "cyberdefense":
+                specs['Capacite_Cyber'] = _courbe_standard(40, [8, 6, 4], [40, 64, 82], plafond=100)
+            elif specialisation == "renseignement":
+                specs['Partage_Renseignement'] = _courbe_standard(30, [10, 8, 6], [30, 60, 84], plafond=100)
+            elif specialisation == "force_nucleaire":
+                specs['Dissuasion_Concertée'] = _courbe_standard(50, [7, 5, 4], [50, 71, 86], plafond=100)
+    elif entity_type == "composante":
+        for pays in config.get("pays_contributeurs", []):
+            specs[f'Contribution_{pays}'] = _courbe_standard(15, [2, 1.5, 1], [15, 21, 25.5], plafond=30)
+
+    return specs
+
+
+class CompiledModel:
+    """Tables de courbes et d'événements d'une entité, prêtes pour l'évaluation vectorisée
+
+    Attributs (K indicateurs, J noeuds maximum, E événements) :
+    - columns : noms des colonnes dans l'ordre de generate_army_data (hors 'Annee')
+    - knots (K, J) : noeuds de changement de segment, complétés par +inf
+    - coefs (K, J + 1, 3) : coefficients c0 + c1 x + c2 x² par segment
+    - base (K,) : niveau d'avant PESCO servant d'origine au facteur de croissance
+    - lo, hi (K,) : plancher et plafond (-inf / +inf si absent)
+    - event_names (E,), event_start / event_end (E,) : fenêtres [début, fin)
+    - event_mult (E, K) : multiplicateurs (1 si l'événement ne touche pas l'indicateur)
+    """
+
+    def __init__(self, entity, start_year, end_year, specs):
+        self.entity = entity
+        self.start_year = start_year
+        self.end_year = end_year
+        self.columns = list(specs)
+        n_knots = max(len(spec["knots"]) for spec in specs.values())
+        n_cols = len(self.columns)
+
+        self.knots = np.full((n_cols, n_knots), np.inf)
+        self.coefs = np.zeros((n_cols, n_knots + 1, 3))
+        self.base = np.zeros(n_cols)
+        self.lo = np.full(n_cols, -np.inf)
+        self.hi = np.full(n_cols, np.inf)
+        for k, column in enumerate(self.columns):
+            spec = specs[column]
+            self.knots[k, :len(spec["knots"])] = spec["knots"]
+            self.coefs[k, :len(spec["coefs"])] = spec["coefs"]
+            # Les segments absents reprennent le dernier segment défini
+            self.coefs[k, len(spec["coefs"]):] = spec["coefs"][-1]
+            self.base[k] = spec["base"]
+            if spec["lo"] is not None:
+                self.lo[k] = spec["lo"]
+            if spec["hi"] is not None:
+                self.hi[k] = spec["hi"]
+
+        self.event_names = [name for name, _, _, _ in EVENEMENTS]
+        self.event_start = np.array([start for _, start, _, _ in EVENEMENTS], dtype=float)
+        self.event_end = np.array([np.inf if end is None else end for _, _, end, _ in EVENEMENTS])
+        self.event_mult = np.ones((len(EVENEMENTS), n_cols))
+        for e, (_, _, _, multipliers) in enumerate(EVENEMENTS):
+            for column, value in multipliers.items():
+                if column in self.columns:
+                    self.event_mult[e, self.columns.index(column)] = value
+
+    @property
+    def years(self):
+        return np.arange(self.start_year, self.end_year + 1, dtype=float)
+
+
+def compile_entity_model(analyzer_or_name):
+    """Compile les courbes d'une entité (nom ou EuropeanArmyAnalyzer)"""
+    if isinstance(analyzer_or_name, EuropeanArmyAnalyzer):
+        analyzer = analyzer_or_name
+    else:
+        analyzer = EuropeanArmyAnalyzer(analyzer_or_name)
+    return CompiledModel(analyzer.country_component, analyzer.start_year,
+                         analyzer.end_year, _curve_specs(analyzer))
+
+
+def evaluate_curves(model, years):
+    """Courbes brutes (avant facteur de croissance, plafond et événements), forme (Y, K)"""
+    years = np.asarray(years, dtype=float)
+    x = years - ANNEE_REFERENCE
+    values = np.empty((len(years), len(model.columns)))
+    for k in range(len(model.columns)):
+        segment = np.searchsorted(model.knots[k], years, side='right')
+        c = model.coefs[k, segment]
+        values[:, k] = c[:, 0] + c[:, 1] * x + c[:, 2] * x * x
+    return values
+
+
+def event_activity(model, years):
+    """Matrice booléenne (E, Y) des événements actifs à chaque date"""
+    years = np.asarray(years, dtype=float)
+    return ((years[None, :] >= model.event_start[:, None]) &
+            (years[None, :] < model.event_end[:, None]))
+
+
+def draw_scenario_parameters(model, n_scenarios, volatilite=0.1, seed=None, include_reference=True):
+    """Tire les facteurs de croissance (S, K) et intensités d'événements (S, E)
+
+    Les deux suivent une loi log-normale centrée sur 1 d'écart-type `volatilite`
+    (en log). Si `include_reference`, le scénario 0 est le scénario de référence
+    (g = e = 1).
+    """
+    rng = np.random.default_rng(seed)
+    growth = np.exp(volatilite * rng.standard_normal((n_scenarios, len(model.columns))))
+    intensity = np.exp(volatilite * rng.standard_normal((n_scenarios, len(model.event_names))))
+    if n_scenarios and include_reference:
+        growth[0] = 1.0
+        intensity[0] = 1.0
+    return growth, intensity
+
+
+def evaluate_scenarios(model, growth, intensity, years=None):
+    """Évalue tous les scénarios en NumPy, résultat de forme (S, Y, K)
+
+    Implémentation de référence : chaque étape (courbe, facteur de croissance,
+    plafond, événements) produit un tableau intermédiaire.
+    """
+    if years is None:
+        years = model.years
+    curves = evaluate_curves(model, years)
+    growth = np.asarray(growth, dtype=float)
+    intensity = np.asarray(intensity, dtype=float)
+
+    values = model.base + growth[:, None, :] * (curves - model.base)
+    values = np.minimum(np.maximum(values, model.lo), model.hi)
+
+    active = event_activity(model, years)
+    for e in range(len(model.event_names)):
+        factor = 1.0 + intensity[:, e, None] * (model.event_mult[e] - 1.0)
+        values *= np.where(active[e][None, :, None], factor[:, None, :], 1.0)
+    return values
+
+
+def _scenario_kernel(years, knots, coefs, base, lo, hi, event_start, event_end,
+                     event_mult, growth, intensity, out):
+    """Noyau fusionné : courbe, croissance, plafond et événements en une passe
+
+    Les opérations flottantes sont celles de evaluate_scenarios, dans le même
+    ordre, afin de reproduire ses résultats.
+    """
+    n_years = years.shape[0]
+    n_cols = knots.shape[0]
+    n_knots = knots.shape[1]
+    n_events = event_start.shape[0]
+
+    # Courbes et fenêtres d'événements : indépendantes du scénario, calculées une fois
+    curves = np.empty((n_years, n_cols))
+    for y in range(n_years):
+        x = years[y] - ANNEE_REFERENCE
+        for k in range(n_cols):
+            segment = 0
+            while segment < n_knots and years[y] >= knots[k, segment]:
+                segment += 1
+            curves[y, k] = (coefs[k, segment, 0] + coefs[k, segment, 1] * x
+                            + coefs[k, segment, 2] * x * x)
+    active = np.empty((n_events, n_years), dtype=np.bool_)
+    for e in range(n_events):
+        for y in range(n_years):
+            active[e, y] = years[y] >= event_start[e] and years[y] < event_end[e]
+
+    for s in prange(growth.shape[0]):
+        for y in range(n_years):
+            for k in range(n_cols):
+                value = base[k] + growth[s, k] * (curves[y, k] - base[k])
+                value = min(max(value, lo[k]), hi[k])
+                for e in range(n_events):
+                    if active[e, y]:
+                        value *= 1.0 + intensity[s, e] * (event_mult[e, k] - 1.0)
+                out[s, y, k] = value
+    return out
+
+
+if NUMBA_DISPONIBLE:
+    _scenario_kernel = njit(parallel=True, cache=True)(_scenario_kernel)
+
+
+def run_scenarios(model, growth, intensity, years=None, use_jit=None):
+    """Évalue les scénarios avec le noyau compilé si disponible, forme (S, Y, K)
+
+    `use_jit=None` choisit automatiquement ; False force la référence NumPy.
+    """
+    if use_jit is None:
+        use_jit = NUMBA_DISPONIBLE
+    if not use_jit:
+        return evaluate_scenarios(model, growth, intensity, years)
+    if not NUMBA_DISPONIBLE:
+        raise ImportError("Numba n'est pas installé : utiliser use_jit=False")
+
+    years = np.ascontiguousarray(model.years if years is None else years, dtype=float)
+    growth = np.ascontiguousarray(growth, dtype=float)
+    intensity = np.ascontiguousarray(intensity, dtype=float)
+    out = np.empty((growth.shape[0], len(years), len(model.columns)))
+    return _scenario_kernel(years, model.knots, model.coefs, model.base, model.lo, model.hi,
+                            model.event_start, model.event_end, model.event_mult,
+                            growth, intensity, out)
+
+
+def simulate_scenarios(analyzer_or_name, n_scenarios=200, volatilite=0.1, seed=None, use_jit=None):
+    """Compile l'entité, tire `n_scenarios` scénarios et les évalue
+
+    Retourne (model, values) avec values de forme (S, Y, K).
+    """
+    model = compile_entity_model(analyzer_or_name)
+    growth, intensity = draw_scenario_parameters(model, n_scenarios, volatilite, seed)
+    return model, run_scenarios(model, growth, intensity, use_jit=use_jit)
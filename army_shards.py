@@ -0,0 +1,361 @@
+"""Exécution répartie par fragments via une file de travaux partagée (SQLite)
+
+Un coordinateur découpe le travail (entité x bloc de scénarios x jeu de
+paramètres) en fragments inscrits dans une file SQLite placée dans un
+répertoire partagé. Des travailleurs, sur n'importe quel noeud voyant ce
+répertoire, réclament les fragments sous bail (lease) prolongé par un battement
+de coeur ; un bail expiré rend le fragment à nouveau disponible, un fragment en
+échec est retenté jusqu'à `max_attempts` fois. Chaque fragment écrit un agrégat
+partiel (army_chunked.PartialAggregate) fusionné à la fin.
+
+L'unité de travail reprend le pipeline EuropeanArmyAnalyzer : configuration du
+registre (éventuellement surchargée par le jeu de paramètres), compilation du
+modèle, évaluation des scénarios. Les graines sont celles de run_chunked_sweep,
+les résultats sont donc identiques à une exécution locale.
+
+Usage :
+    python3 army_shards.py submit DOSSIER --scenarios 1000000 --fragment 50000
+    python3 army_shards.py worker DOSSIER          # sur chaque noeud, autant que voulu
+    python3 army_shards.py merge DOSSIER --sortie stats.csv
+    python3 army_shards.py local DOSSIER -j 4      # travailleurs locaux (tests)
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from Army import ENTITES, EuropeanArmyAnalyzer
+from army_io import atomic_write
+from army_chunked import (PartialAggregate, draw_range, histogram_edges, plan_chunks,
+                          stats_frame, time_steps)
+from army_scenarios import compile_entity_model, run_scenarios
+
+FICHIER_FILE = 'queue.sqlite'
+DOSSIER_RESULTATS = 'resultats'
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS shards (
+        id INTEGER PRIMARY KEY,
+        groupe TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        worker TEXT,
+        lease_until REAL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        result TEXT)""",
+    "CREATE INDEX IF NOT EXISTS shards_status ON shards (status, lease_until)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+]
+
+
+class ShardQueue:
+    """File de fragments SQLite avec baux, battements de coeur et reprises"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, FICHIER_FILE)
+        os.makedirs(os.path.join(directory, DOSSIER_RESULTATS), exist_ok=True)
+        with self._connect() as db:
+            for statement in SCHEMA:
+                db.execute(statement)
+
+    def _connect(self):
+        # Autocommit : les transactions sont ouvertes explicitement (BEGIN IMMEDIATE)
+        return _Connection(self.path)
+
+    def submit(self, shards, plan, max_attempts=3, reset=False):
+        """Inscrit les fragments [(groupe, payload)] et le plan du balayage"""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            if reset:
+                db.execute("DELETE FROM shards")
+            elif db.execute("SELECT COUNT(*) FROM shards").fetchone()[0]:
+                db.execute("ROLLBACK")
+                raise ValueError(f"La file {self.path} contient déjà des fragments (reset=True pour vider)")
+            db.executemany("INSERT INTO shards (groupe, payload) VALUES (?, ?)",
+                           [(groupe, json.dumps(payload)) for groupe, payload in shards])
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('plan', ?)", (json.dumps(plan),))
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('max_attempts', ?)", (str(max_attempts),))
+            db.execute("COMMIT")
+
+    def meta(self, key):
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def claim(self, worker, lease_seconds):
+        """Réclame un fragment libre ou dont le bail a expiré ; None s'il n'y en a pas"""
+        now = time.time()
+        max_attempts = self.meta('max_attempts') or 3
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            # Les fragments abandonnés trop souvent sont marqués en échec
+            db.execute("""UPDATE shards SET status = 'failed', worker = NULL,
+                              error = COALESCE(error, 'bail expiré')
+                          WHERE status = 'running' AND lease_until < ? AND attempts >= ?""",
+                       (now, max_attempts))
+            row = db.execute("""SELECT id, payload FROM shards
+                                WHERE status = 'pending' OR (status = 'running' AND lease_until < ?)
+                                ORDER BY id LIMIT 1""", (now,)).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute("""UPDATE shards SET status = 'running', worker = ?, lease_until = ?,
+                              attempts = attempts + 1
+                          WHERE id = ?""", (worker, now + lease_seconds, row[0]))
+            db.execute("COMMIT")
+        return row[0], json.loads(row[1])
+
+    def heartbeat(self, shard_id, worker, lease_seconds):
+        """Prolonge le bail ; False si le fragment a été repris par un autre travailleur"""
+        with self._connect() as db:
+            cursor = db.execute("""UPDATE shards SET lease_until = ?
+                                   WHERE id = ? AND worker = ? AND status = 'running'""",
+                                (time.time() + lease_seconds, shard_id, worker))
+            return cursor.rowcount == 1
+
+    def complete(self, shard_id, worker, result):
+        with self._connect() as db:
+            cursor = db.execute("""UPDATE shards SET status = 'done', result = ?, error = NULL
+                                   WHERE id = ? AND worker = ? AND status = 'running'""",
+                                (result, shard_id, worker))
+            return cursor.rowcount == 1
+
+    def fail(self, shard_id, worker, error):
+        """Rend le fragment à la file, ou le marque en échec après max_attempts tentatives"""
+        max_attempts = self.meta('max_attempts') or 3
+        with self._connect() as db:
+            db.execute("""UPDATE shards SET worker = NULL, error = ?,
+                              status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END
+                          WHERE id = ? AND worker = ? AND status = 'running'""",
+                       (error, max_attempts, shard_id, worker))
+
+    def counts(self):
+        with self._connect() as db:
+            rows = db.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall()
+        return dict(rows)
+
+    def shards(self, status=None):
+        query = "SELECT id, groupe, payload, status, attempts, error, result FROM shards"
+        with self._connect() as db:
+            if status is None:
+                rows = db.execute(query + " ORDER BY id").fetchall()
+            else:
+                rows = db.execute(query + " WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [{'id': r[0], 'groupe': r[1], 'payload': json.loads(r[2]), 'status': r[3],
+                 'attempts': r[4], 'error': r[5], 'result': r[6]} for r in rows]
+
+
+class _Connection:
+    """Connexion SQLite ouverte puis fermée à chaque opération (sûr entre processus)"""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, *exc):
+        self.db.close()
+        return False
+
+
+def submit_sweep(directory, entities=None, n_scenarios=100_000, taille_fragment=20_000,
+                 parametres=None, volatilite=0.1, seed=0, pas='annuel',
+                 budget_memoire_mo=256, max_attempts=3, reset=False):
+    """Découpe le balayage en fragments entité x bloc de scénarios x jeu de paramètres
+
+    `parametres` est une liste de surcharges de configuration du registre
+    (par ex. [{}, {"projets_pesco": 20}]) ; par défaut la configuration seule.
+    """
+    entities = list(entities or ENTITES)
+    parametres = list(parametres or [{}])
+    shards = []
+    for e_index, entity in enumerate(entities):
+        for p_index, overrides in enumerate(parametres):
+            for first in range(0, n_scenarios, taille_fragment):
+                shards.append((f'{e_index}:{p_index}', {
+                    'entity': entity, 'entity_index': e_index,
+                    'param_index': p_index, 'overrides': overrides,
+                    'first': first, 'last': min(first + taille_fragment, n_scenarios),
+                    'n_scenarios': n_scenarios, 'volatilite': volatilite, 'seed': seed,
+                    'pas': pas, 'budget_memoire_mo': budget_memoire_mo,
+                }))
+    plan = {'entities': entities, 'parametres': parametres, 'n_scenarios': n_scenarios,
+            'taille_fragment': taille_fragment, 'volatilite': volatilite, 'seed': seed, 'pas': pas}
+    ShardQueue(directory).submit(shards, plan, max_attempts=max_attempts, reset=reset)
+    print(f"🇪🇺 {len(shards)} fragments inscrits dans {directory}")
+    return len(shards)
+
+
+def _shard_model(payload):
+    """Pipeline EuropeanArmyAnalyzer d'un fragment : configuration surchargée puis modèle"""
+    analyzer = EuropeanArmyAnalyzer(payload['entity'])
+    analyzer.config = {**analyzer.config, **payload['overrides']}
+    model = compile_entity_model(analyzer)
+    entity_seed = np.random.SeedSequence(payload['seed'], spawn_key=(payload['entity_index'],))
+    steps = time_steps(model, payload['pas'])
+    chunk = plan_chunks(payload['n_scenarios'], len(steps), len(model.columns),
+                        payload['budget_memoire_mo'])
+    edges = histogram_edges(model, entity_seed, payload['n_scenarios'], chunk,
+                            payload['volatilite'], steps)
+    return model, entity_seed, steps, chunk, edges
+
+
+def run_shard(payload, directory, shard_id):
+    """Évalue un fragment et écrit son agrégat partiel (écriture atomique)"""
+    model, entity_seed, steps, chunk, edges = _shard_model(payload)
+    aggregate = PartialAggregate(*edges)
+    for first in range(payload['first'], payload['last'], chunk):
+        growth, intensity = draw_range(model, entity_seed, first,
+                                       min(first + chunk, payload['last']), payload['volatilite'])
+        aggregate.update(run_scenarios(model, growth, intensity, years=steps))
+
+    path = os.path.join(directory, DOSSIER_RESULTATS, f'fragment_{shard_id:06d}.npz')
+    return atomic_write(path, aggregate.save)
+
+
+def _heartbeat(queue, shard_id, worker, lease_seconds, stop):
+    while not stop.wait(lease_seconds / 3):
+        if not queue.heartbeat(shard_id, worker, lease_seconds):
+            break
+
+
+def run_worker(directory, worker_id=None, lease_seconds=60, poll_seconds=1.0):
+    """Réclame et exécute des fragments jusqu'à épuisement de la file ; retourne le nombre traité"""
+    queue = ShardQueue(directory)
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    completed = 0
+    while True:
+        claimed = queue.claim(worker_id, lease_seconds)
+        if claimed is None:
+            counts = queue.counts()
+            if not counts.get('pending') and not counts.get('running'):
+                break
+            time.sleep(poll_seconds)  # Fragments en cours ailleurs : leur bail peut expirer
+            continue
+
+        shard_id, payload = claimed
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(queue, shard_id, worker_id, lease_seconds, stop),
+                                daemon=True)
+        beat.start()
+        try:
+            path = run_shard(payload, directory, shard_id)
+        except Exception as exc:
+            queue.fail(shard_id, worker_id, repr(exc))
+            print(f"  ✗ [{worker_id}] fragment {shard_id}: {exc!r}")
+            continue
+        finally:
+            stop.set()
+            beat.join()
+        if queue.complete(shard_id, worker_id, path):
+            completed += 1
+    return completed
+
+
+def run_local(directory, n_workers=None, lease_seconds=60):
+    """Lance des travailleurs dans des processus locaux et attend leur fin"""
+    n_workers = n_workers or os.cpu_count()
+    processes = [multiprocessing.Process(target=run_worker, args=(directory, f'local-{i}', lease_seconds))
+                 for i in range(n_workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return ShardQueue(directory).counts()
+
+
+def merge_results(directory, partiel=False):
+    """Fusionne les agrégats partiels par (entité, jeu de paramètres)
+
+    Retourne un DataFrame long (Entite, Parametres, Pas, Indicateur, n, moyenne,
+    ecart_type, min, max, p5, p50, p95). Lève une erreur si des fragments ne
+    sont pas terminés, sauf avec `partiel=True` (groupes complets seulement).
+    """
+    queue = ShardQueue(directory)
+    plan = queue.meta('plan')
+    shards = queue.shards()
+    unfinished = {shard['groupe'] for shard in shards if shard['status'] != 'done'}
+    if unfinished and not partiel:
+        raise ValueError(f"Fragments non terminés: {queue.counts()}")
+
+    groups = {}
+    for shard in shards:
+        if shard['groupe'] not in unfinished:
+            groups.setdefault(shard['groupe'], []).append(shard)
+
+    frames = []
+    for groupe in sorted(groups, key=lambda g: tuple(map(int, g.split(':')))):
+        members = groups[groupe]
+        payload = members[0]['payload']
+        model, _, steps, _, edges = _shard_model(payload)
+        merged = PartialAggregate(*edges)
+        for shard in members:
+            merged.merge(PartialAggregate.load(shard['result']))
+        frame = stats_frame(payload['entity'], steps, model.columns, merged)
+        frame.insert(1, 'Parametres', json.dumps(plan['parametres'][payload['param_index']],
+                                                  ensure_ascii=False, sort_keys=True))
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def main():
+    """Interface en ligne de commande : submit, worker, local, status, merge"""
+    parser = argparse.ArgumentParser(description="Balayages répartis par fragments")
+    sub = parser.add_subparsers(dest='commande', required=True)
+
+    submit = sub.add_parser('submit', help="Inscrire un balayage")
+    submit.add_argument('dossier')
+    submit.add_argument('--entites', nargs='*')
+    submit.add_argument('--scenarios', type=int, default=100_000)
+    submit.add_argument('--fragment', type=int, default=20_000)
+    submit.add_argument('--parametres', type=json.loads, default=None,
+                        help='Liste JSON de surcharges, ex. \'[{}, {"projets_pesco": 20}]\'')
+    submit.add_argument('--volatilite', type=float, default=0.1)
+    submit.add_argument('--seed', type=int, default=0)
+    submit.add_argument('--pas', choices=['annuel', 'mensuel'], default='annuel')
+    submit.add_argument('--reset', action='store_true')
+
+    worker = sub.add_parser('worker', help="Exécuter des fragments")
+    worker.add_argument('dossier')
+    worker.add_argument('--bail', type=float, default=60)
+
+    local = sub.add_parser('local', help="Lancer des travailleurs locaux")
+    local.add_argument('dossier')
+    local.add_argument('-j', '--jobs', type=int, default=None)
+
+    status = sub.add_parser('status', help="État de la file")
+    status.add_argument('dossier')
+
+    merge = sub.add_parser('merge', help="Fusionner les résultats")
+    merge.add_argument('dossier')
+    merge.add_argument('--sortie', default='army_sweep_stats.csv')
+    merge.add_argument('--partiel', action='store_true')
+
+    args = parser.parse_args()
+    if args.commande == 'submit':
+        submit_sweep(args.dossier, args.entites, args.scenarios, args.fragment, args.parametres,
+                     args.volatilite, args.seed, args.pas, reset=args.reset)
+    elif args.commande == 'worker':
+        print(f"✅ {run_worker(args.dossier, lease_seconds=args.bail)} fragment(s) traité(s)")
+    elif args.commande == 'local':
+        print(f"✅ {run_local(args.dossier, args.jobs)}")
+    elif args.commande == 'status':
+        print(ShardQueue(args.dossier).counts())
+    elif args.commande == 'merge':
+        stats = merge_results(args.dossier, partiel=args.partiel)
+        stats.to_csv(args.sortie, index=False)
+        print(f"💾 Statistiques sauvegardées: {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
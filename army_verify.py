@@ -0,0 +1,74 @@
+"""Vérification du moteur de scénarios contre ses références, pour chaque entité
+
+- le noyau compilé (run_scenarios, Numba) doit reproduire bit à bit
+  l'implémentation NumPy de référence (evaluate_scenarios), aux pas annuels
+  et mensuels ;
+- le scénario unité (g = e = 1) doit reproduire generate_army_data.
+
+Usage :
+    python3 army_verify.py                 # toutes les entités
+    python3 army_verify.py France -n 5000
+Code de sortie non nul en cas d'écart.
+"""
+import argparse
+import contextlib
+import io
+import sys
+
+import numpy as np
+
+from Army import ENTITES, EuropeanArmyAnalyzer
+from army_scenarios import (NUMBA_DISPONIBLE, compile_entity_model, draw_scenario_parameters,
+                            evaluate_scenarios, run_scenarios)
+
+
+def verify_entity(name, n_scenarios=1000, volatilite=0.1, seed=0):
+    """Liste des écarts constatés pour une entité (vide si tout concorde)"""
+    errors = []
+    analyzer = EuropeanArmyAnalyzer(name)
+    model = compile_entity_model(analyzer)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = analyzer.generate_army_data()
+    if list(df.columns[1:]) != model.columns:
+        errors.append(f"colonnes {model.columns} != {list(df.columns[1:])}")
+    else:
+        unit = evaluate_scenarios(model, np.ones((1, len(model.columns))),
+                                  np.ones((1, len(model.event_names))))[0]
+        expected = df[model.columns].to_numpy(dtype=float)
+        if not np.allclose(unit, expected, rtol=1e-9, atol=1e-9):
+            worst = np.abs(unit - expected).max()
+            errors.append(f"scénario unité != generate_army_data (écart max {worst:.3g})")
+
+    if NUMBA_DISPONIBLE:
+        growth, intensity = draw_scenario_parameters(model, n_scenarios, volatilite, seed)
+        monthly = model.start_year + np.arange((model.end_year - model.start_year + 1) * 12) / 12
+        for label, years in (('annuel', model.years), ('mensuel', monthly)):
+            reference = evaluate_scenarios(model, growth, intensity, years)
+            compiled = run_scenarios(model, growth, intensity, years, use_jit=True)
+            if not np.array_equal(reference, compiled):
+                n_diff = np.count_nonzero(reference != compiled)
+                errors.append(f"noyau compilé != référence NumPy ({label}, {n_diff} valeur(s))")
+    return errors
+
+
+def main():
+    """Vérifie les entités demandées (toutes par défaut)"""
+    parser = argparse.ArgumentParser(description="Vérification du moteur de scénarios")
+    parser.add_argument('entites', nargs='*', help="Entités à vérifier (toutes par défaut)")
+    parser.add_argument('-n', '--scenarios', type=int, default=1000, help="Scénarios tirés par entité")
+    args = parser.parse_args()
+
+    if not NUMBA_DISPONIBLE:
+        print("⚠️ Numba absent : seule la concordance avec generate_army_data est vérifiée")
+    failures = 0
+    for name in args.entites or ENTITES:
+        errors = verify_entity(name, args.scenarios)
+        failures += bool(errors)
+        print(f"  {'✗' if errors else '✓'} {name}" + (f": {'; '.join(errors)}" if errors else ''))
+    print(f"\n{'❌' if failures else '✅'} {failures} entité(s) en écart")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())